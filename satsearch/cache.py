@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import logging
+import re
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# default cache location, lifetime (seconds, 0 disables caching) and size bound (bytes)
+CACHE_DIR = os.getenv('SATSEARCH_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'sat-search'))
+CACHE_TTL = int(os.getenv('SATSEARCH_CACHE_TTL', 3600))
+CACHE_SIZE = int(os.getenv('SATSEARCH_CACHE_SIZE', 256 * 1024 * 1024))
+
+
+class ResponseCache(object):
+    """ On-disk cache of API responses, keyed on the URL, request body and headers
+
+    Entries expire after ttl seconds, or as told by a Cache-Control max-age, and are not
+    stored at all for no-store. Expired entries with an ETag are revalidated with
+    If-None-Match. Once the entries, counted as they are written, take more than max_size
+    bytes, the least recently used ones are evicted down to 90% of it, so the directory
+    is only scanned once every so many puts.
+    """
+
+    def __init__(self, path=CACHE_DIR, ttl=CACHE_TTL, max_size=CACHE_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # bytes of the entries, counted with a scan on the first put and then kept up to date
+        self.size = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s (%s hits, %s misses)' % (self.path, self.hits, self.misses)
+
+    @staticmethod
+    def key(url, body=None, headers=None):
+        """ Content address of a request """
+        request = json.dumps([url, body, headers or {}], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def filename(self, key):
+        return os.path.join(self.path, key[0:2], key + '.json')
+
+    def get(self, key):
+        """ Cached entry {'expires', 'etag', 'control', 'data'} for key (possibly expired), None if not cached """
+        fname = self.filename(key)
+        try:
+            with open(fname) as f:
+                entry = json.load(f)
+            # mark as recently used
+            os.utime(fname)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    @staticmethod
+    def fresh(entry):
+        """ True if entry can be used without asking the server """
+        return entry is not None and entry['expires'] > time.time()
+
+    def put(self, key, data, headers=None):
+        """ Store response data for key, using the response headers for expiry and validation """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        control = headers.get('cache-control', '').lower()
+        if 'no-store' in control or self.ttl <= 0:
+            return None
+        ttl = self.ttl
+        max_age = re.search(r'max-age=(\d+)', control)
+        if 'no-cache' in control:
+            ttl = 0
+        elif max_age is not None:
+            ttl = int(max_age.group(1))
+        entry = {
+            'expires': time.time() + ttl,
+            'etag': headers.get('etag', None),
+            # kept for revalidations, whose 304 may not repeat it
+            'control': headers.get('cache-control', None),
+            'data': data
+        }
+        if ttl <= 0 and entry['etag'] is None:
+            # nothing to reuse or revalidate
+            return None
+        fname = self.filename(key)
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        try:
+            replaced = os.path.getsize(fname)
+        except OSError:
+            replaced = 0
+        # write to a temporary file and rename, so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fname), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, fname)
+        self.added(os.path.getsize(fname) - replaced)
+        return entry
+
+    def refresh(self, key, entry, headers=None):
+        """ Store an entry revalidated by the server (304 Not Modified), with its Cache-Control unless it has one """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        if 'cache-control' not in headers and entry.get('control', None) is not None:
+            headers['cache-control'] = entry['control']
+        return self.put(key, entry['data'], headers=dict(headers, etag=entry['etag']))
+
+    def entries(self):
+        """ List of (mtime, size, filename) of all entries """
+        entries = []
+        if not os.path.isdir(self.path):
+            return entries
+        for sub in os.scandir(self.path):
+            if not sub.is_dir():
+                continue
+            for f in os.scandir(sub.path):
+                if f.name.endswith('.json'):
+                    try:
+                        st = f.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, f.path))
+        return entries
+
+    def added(self, nbytes):
+        """ Count nbytes more in the cache, evicting entries if it is over max_size """
+        with self._lock:
+            if self.size is None:
+                # the scan includes the entry just written
+                self.size = sum(e[1] for e in self.entries())
+            else:
+                self.size += nbytes
+            over = self.size > self.max_size
+        if over:
+            self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries until the cache is under 90% of max_size """
+        entries = self.entries()
+        size = sum(e[1] for e in entries)
+        for mtime, fsize, fname in sorted(entries):
+            if size <= self.max_size * 0.9:
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+            size -= fsize
+        with self._lock:
+            # other processes sharing the directory are accounted for by the scan
+            self.size = size
+
+    def clear(self):
+        """ Remove all entries """
+        for mtime, fsize, fname in self.entries():
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+        with self._lock:
+            self.size = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """ Get the ResponseCache shared by all searches, None if disabled with SATSEARCH_CACHE_TTL=0 """
+    global _cache
+    with _cache_lock:
+        if _cache is None and CACHE_TTL > 0:
+            _cache = ResponseCache()
+        return _cache
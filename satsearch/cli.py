@@ -6,7 +6,10 @@ import sys
 
 from .version import __version__
 from satsearch import Search
-from satstac import ItemCollection
+from satsearch.cache import ResponseCache
+from satstac import Downloader, ItemCollection
+from satstac.itemstore import BINARY_EXTENSION
+from satstac.streaming import FeatureCollectionWriter
 from satstac.utils import dict_merge
 
 API_URL = os.getenv('STAC_API_URL', None)
@@ -31,6 +34,8 @@ class SatUtilsParser(argparse.ArgumentParser):
         self.download_group.add_argument('--download', help='Download assets', default=None, nargs='*')
         h = 'Acknowledge paying egress costs for downloads (if in requester pays bucket on AWS)'
         self.download_group.add_argument('--requester-pays', help=h, default=False, action='store_true', dest='requester_pays')
+        self.download_group.add_argument('--download-workers', help='Number of assets downloaded concurrently',
+                                         type=int, default=1, dest='download_workers')
 
         self.output_parser = argparse.ArgumentParser(add_help=False)
         self.output_group = self.output_parser.add_argument_group('output options')
@@ -38,7 +43,7 @@ class SatUtilsParser(argparse.ArgumentParser):
         self.output_group.add_argument('--print-md', help=h, default=None, nargs='*', dest='printmd')
         h = 'Print calendar showing dates'
         self.output_group.add_argument('--print-cal', help=h, dest='printcal')
-        self.output_group.add_argument('--save', help='Save results as GeoJSON', default=None)
+        self.output_group.add_argument('--save', help='Save results as GeoJSON (gzip compressed if ending with .gz, binary format if ending with .stacb)', default=None)
 
     def parse_args(self, *args, **kwargs):
         """ Parse arguments """
@@ -100,10 +105,16 @@ class SatUtilsParser(argparse.ArgumentParser):
         parser.search_group.add_argument('--url', help='URL of the API', default=API_URL)
         parser.search_group.add_argument('--headers', help='Additional request headers (JSON file or string)', default=None)
         parser.search_group.add_argument('--limit', help='Limits the total number of items returned', default=None)
+        h = 'Number of page requests kept in flight (for APIs with page or offset based pagination)'
+        parser.search_group.add_argument('--prefetch', help=h, type=int, default=0)
+        h = 'Always query the API, ignoring the response cache'
+        parser.search_group.add_argument('--no-cache', help=h, action='store_false', default=True, dest='cache')
+        h = 'Seconds API responses are reused from the response cache (0 does not cache)'
+        parser.search_group.add_argument('--cache-ttl', help=h, type=int, default=None, dest='cache_ttl')
 
         parents.append(parser.download_parser)
         lparser = subparser.add_parser('load', help='Load items from previous search', parents=parents)
-        lparser.add_argument('items', help='GeoJSON file of Items')
+        lparser.add_argument('items', help='GeoJSON (or .stacb) file of Items')
         return parser
 
     class KeyValuePair(argparse.Action):
@@ -116,44 +127,95 @@ class SatUtilsParser(argparse.ArgumentParser):
 
 def main(items=None, printmd=None, printcal=None,
          found=False, filename_template='${collection}/${date}/${id}',
-         save=None, download=None, requester_pays=False, headers=None, **kwargs):
+         save=None, download=None, requester_pays=False, headers=None, prefetch=0, download_workers=1,
+         cache=True, cache_ttl=None, **kwargs):
     """ Main function for performing a search """
     
+    # Collections known before the Items arrive, written ahead of them when saving
+    collections = None
     if items is None:
         ## if there are no items then perform a search
-        search = Search.search(headers=headers, **kwargs)
+        if cache and cache_ttl is not None:
+            cache = ResponseCache(ttl=cache_ttl) if cache_ttl > 0 else False
+        search = Search.search(headers=headers, cache=cache, **kwargs)
         ## Commenting out found logic until functions correctly.
         if found:
              num = search.found(headers=headers)
              print('%s items found' % num)
              return num
-        items = search.items(headers=headers)
+        items = search.iter_items(headers=headers, prefetch=prefetch)
+        if save is not None and kwargs.get('collections'):
+            try:
+                collections = [search.collection(cid, headers=headers) for cid in kwargs['collections']]
+            except Exception:
+                # the writer adds the Collections of the Items after them instead
+                collections = None
     else:
-        # otherwise, load a search from a file
-        items = ItemCollection.open(items)
-
-    print('%s items found' % len(items))
+        # otherwise, load a search from a file, one Item at a time
+        items = ItemCollection.iter_open(items)
+
+    # Items are printed, saved and downloaded as they arrive, and only kept if the calendar
+    # or the binary format (which is written in one go) needs them all
+    binary = save is not None and save.endswith(BINARY_EXTENSION)
+    keep = printcal or binary
+    kept = []
+    num = 0
+    downloader = Downloader(workers=download_workers) if download is not None else None
+    writer = None
+    if save is not None and not binary:
+        writer = FeatureCollectionWriter(save, collections=collections, **ItemCollection.metadata())
 
     # print metadata
     if printmd is not None:
-        print(items.summary(printmd))
+        printmd = printmd or ['date', 'id']
+        print(ItemCollection.summary_header(printmd), end='')
+
+    try:
+        for item in items:
+            num += 1
+            if printmd is not None:
+                print(ItemCollection.summary_line(item, printmd), end='')
+
+            # download files given `download` keys
+            if download is not None:
+                keys = item.assets.keys() if 'ALL' in download else download
+                for key in keys:
+                    downloader.submit(item, key, filename_template=filename_template, requester_pays=requester_pays)
+
+            if writer is not None:
+                writer.write(item)
+
+            if keep:
+                kept.append(item)
+    except BaseException:
+        # a failed search leaves no partial --save file
+        if writer is not None:
+            writer.discard()
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+        if downloader is not None:
+            downloader.close()
+
+    if downloader is not None:
+        print('Downloaded %s' % downloader)
+
+    print('%s items found' % num)
+    if not keep:
+        return num
+
+    collections = {i._collection.id: i._collection for i in kept if i._collection is not None}
+    items = ItemCollection(kept, collections=list(collections.values()))
 
     # print calendar
     if printcal:
         print(items.calendar(printcal))
 
-    # save all metadata in JSON file
-    if save is not None:
+    # save all metadata in the binary file
+    if binary:
         items.save(filename=save)
 
-    # download files given `download` keys
-    if download is not None:
-        if 'ALL' in download:
-            # get complete set of assets
-            download = set([k for i in items for k in i.assets])
-        for key in download:
-            items.download(key=key, filename_template=filename_template, requester_pays=requester_pays)
-
     return items
 
 
@@ -1,11 +1,15 @@
 import json
+import math
 import os
 import logging
-import requests
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from satsearch.cache import ResponseCache, get_cache
 from satstac import Collection, Item, ItemCollection
-from satstac.utils import dict_merge
-from urllib.parse import urljoin
+from satstac.collection import get_registry
+from satstac.utils import dict_merge, get_session
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +28,15 @@ class Search(object):
         if url is None:
             raise SatSearchError("URL not provided, pass into Search or define STAC_API_URL environment variable")
         self.url = url.rstrip("/") + "/"
+        # anything with a requests-like post() can be used to send queries, default to the shared pooled session
+        self.session = kwargs.pop('session', None) or get_session()
+        # responses are cached on disk: True for the shared cache, a ResponseCache, or False to disable
+        cache = kwargs.pop('cache', True)
+        self.cache = cache if isinstance(cache, ResponseCache) else (get_cache() if cache else None)
         self.kwargs = kwargs
         self.limit = int(self.kwargs['limit']) if 'limit' in self.kwargs else None
+        # number of matching Items as reported by the last page received (None if not reported)
+        self.matched = None
 
     @classmethod
     def search(cls, headers=None, **kwargs):
@@ -51,80 +62,207 @@ class Search(object):
             kwargs['sortby'] = sorts
         return Search(**kwargs)
 
-    def found(self, headers=None):
+    def found(self, headers=None, cache=True):
         """ Small query to determine total number of hits """
-        kwargs = {
-            'limit': 0
-        }
-        kwargs.update(self.kwargs)
+        kwargs = dict(self.kwargs)
+        kwargs['limit'] = 0
         url = urljoin(self.url, 'search')
         
-        results = self.query(url=url, headers=headers, **kwargs)
+        results = self.query(url=url, headers=headers, cache=cache, **kwargs)
         # TODO - check for status_code
         logger.debug(f"Found: {json.dumps(results)}")
-        found = 0
+        found = self.matched_count(results)
+        if found is not None:
+            self.matched = found
+        return 0 if found is None else found
+
+    @staticmethod
+    def matched_count(results):
+        """ Number of matching Items reported in a search response, None if not reported """
         if 'context' in results:
-            found = results['context']['matched']
-        elif 'numberMatched' in results:
-            found = results['numberMatched']
-        return found
+            return results['context'].get('matched', None)
+        return results.get('numberMatched', None)
 
-    def query(self, url=None, headers=None, **kwargs):
-        """ Get request """
+    def query(self, url=None, headers=None, cache=True, **kwargs):
+        """ Get request (from the response cache unless cache is False) """
         url = url or urljoin(self.url, 'search')
         logger.debug('Query URL: %s, Body: %s' % (url, json.dumps(kwargs)))
-        response = requests.post(url, json=kwargs, headers=headers)
+        cache = self.cache if cache else None
+        entry = None
+        if cache is not None:
+            key = cache.key(url, kwargs, headers)
+            entry = cache.get(key)
+            if cache.fresh(entry):
+                cache.hits += 1
+                logger.debug('Cached response for %s' % url)
+                return entry['data']
+            cache.misses += 1
+            if entry is not None and entry['etag'] is not None:
+                # expired, but the server can tell if it is still valid
+                headers = dict(headers or {}, **{'If-None-Match': entry['etag']})
+        response = self.session.post(url, json=kwargs, headers=headers)
         logger.debug(f"Response: {response.text}")
+        if entry is not None and response.status_code == 304:
+            cache.refresh(key, entry, getattr(response, 'headers', None))
+            return entry['data']
         # API error
         if response.status_code != 200:
             raise SatSearchError(response.text)
-        return response.json()
+        results = response.json()
+        if cache is not None:
+            cache.put(key, results, getattr(response, 'headers', None))
+        return results
 
-    def collection(self, cid, headers=None):
-        """ Get a Collection record """
+    def collection(self, cid, headers=None, cache=True):
+        """ Get a Collection record, fetched once and then shared through the Collection registry """
         url = urljoin(self.url, 'collections/%s' % cid)
-        return Collection(self.query(url=url, headers=headers))
+        if not cache:
+            return get_registry().put(url, Collection(self.query(url=url, headers=headers, cache=cache)))
+        return get_registry().load(url, lambda: Collection(self.query(url=url, headers=headers)))
 
-    def items(self, limit=10000, page_limit=500, headers=None):
-        """ Return all of the Items and Collections for this search """
-        found = self.found(headers=headers)
+    def fetch_page(self, nextlink, page_limit=500, headers=None, cache=True):
+        """ Request the page a next link points to """
+        if nextlink.get('method', 'GET') == 'GET':
+            return self.query(url=nextlink['href'], headers=headers, cache=cache, **self.kwargs)
+        _headers = nextlink.get('headers', {})
+        _body = nextlink.get('body', {})
+        
+        if nextlink.get('merge', False):
+            _headers.update(headers or {})
+            _body.update(self.kwargs)
+        _body.update({'limit': page_limit})
+
+        return self.query(url=nextlink['href'], headers=headers, cache=cache, **_body)
+
+    @staticmethod
+    def link_params(nextlink):
+        """ Parameters of a next link, from its body (POST) or query string (GET) """
+        if nextlink.get('method', 'GET') == 'GET':
+            return dict(parse_qsl(urlparse(nextlink['href']).query))
+        return nextlink.get('body', {})
+
+    @classmethod
+    def paging_key(cls, nextlink):
+        """ 'page' or 'offset' if the next link uses a counter, None for opaque tokens """
+        params = cls.link_params(nextlink)
+        for key in ['page', 'offset']:
+            if str(params.get(key, '')).isdigit():
+                return key
+        return None
+
+    @classmethod
+    def advance_link(cls, nextlink, pages, page_limit=500):
+        """ Next link `pages` pages after nextlink, or None if only the previous response can tell it """
+        # page and offset counters can be computed ahead, opaque tokens can not
+        key = cls.paging_key(nextlink)
+        if key is None:
+            return None
+        params = cls.link_params(nextlink)
+        step = 1 if key == 'page' else page_limit
+        params = dict(params, **{key: int(params[key]) + pages * step})
+        if 'limit' in params:
+            params['limit'] = page_limit
+        link = dict(nextlink)
+        if link.get('method', 'GET') == 'GET':
+            parts = urlparse(nextlink['href'])
+            link['href'] = urlunparse(parts._replace(query=urlencode(params)))
+        else:
+            link['body'] = params
+        return link
+
+    def iter_pages(self, limit=10000, page_limit=500, headers=None, prefetch=0, first_page_limit=None, cache=True):
+        """ Iterate over the pages of this search, yielding a list of Items per page """
+        # pages never ask for more than the limit, so a search smaller than a page is a single request.
+        # first_page_limit sizes the first page only, so a small search is done in one small request
         limit = self.limit or limit
-        if found > limit:
-            logger.warning('There are more items found (%s) than the limit (%s) provided.' % (found, limit))
+        page_limit = min(page_limit, limit)
+        page_size = min(first_page_limit or page_limit, limit)
 
         nextlink = {
             'method': 'POST',
             'href': urljoin(self.url, 'search'),
             'headers': headers,
-            'body': self.kwargs,
+            'body': dict(self.kwargs),
             'merge': False
         }
 
-        items = []
-        while nextlink and len(items) < limit:
-            if nextlink.get('method', 'GET') == 'GET':
-                resp = self.query(url=nextlink['href'], headers=headers, **self.kwargs)
-            else:
-                _headers = nextlink.get('headers', {})
-                _body = nextlink.get('body', {})
-                _body.update({'limit': page_limit})
-                
-                if nextlink.get('merge', False):
-                    _headers.update(headers or {})
-                    _body.update(self.kwargs)
-
-                resp = self.query(url=nextlink['href'], headers=headers, **_body)
-            items += [Item(i) for i in resp['features']]
-            links = [l for l in resp['links'] if l['rel'] == 'next']
-            nextlink = links[0] if len(links) == 1 else None
-       
-        # retrieve collections
-        collections = []
+        count = 0
+        # Items at the start of the next page that were already yielded
+        skip = 0
+        executor = None
+        pending = deque()
         try:
-            for c in set([item._data['collection'] for item in items if 'collection' in item._data]):
-                collections.append(self.collection(c, headers=headers))
-                #del collections[c]['links']
-        except:
-            pass
+            while nextlink and count < limit:
+                if pending:
+                    resp = pending.popleft().result()
+                else:
+                    resp = self.fetch_page(nextlink, page_limit=page_size, headers=headers, cache=cache)
+                matched = self.matched_count(resp)
+                if matched is not None:
+                    self.matched = matched
+                # the last page is trimmed to the limit, pages of the API's own size may pass it
+                items = [Item(i) for i in resp['features'][skip:][0:limit - count]]
+                skip = 0
+                count += len(items)
+                yield items
+                links = [l for l in resp['links'] if l['rel'] == 'next']
+                nextlink = links[0] if len(links) == 1 and len(items) > 0 else None
+                if not nextlink:
+                    continue
+                if page_size < page_limit:
+                    if self.paging_key(nextlink) == 'page':
+                        # page counters assume a constant page size, so the rest is fetched from a full
+                        # size first page, skipping the Items of the small one
+                        nextlink = self.advance_link(nextlink, -1, page_limit)
+                        skip = count
+                    page_size = page_limit
+                if not prefetch:
+                    continue
+                if executor is None:
+                    if self.advance_link(nextlink, 0, page_size) is None:
+                        prefetch = 0
+                        continue
+                    executor = ThreadPoolExecutor(max_workers=prefetch)
+                # do not request pages past the matched count, when the API reports it
+                expected = limit if self.matched is None else min(self.matched, limit)
+                remaining = math.ceil(max(expected - count, 0) / page_size)
+                while len(pending) < min(prefetch, remaining):
+                    link = self.advance_link(nextlink, len(pending), page_size)
+                    pending.append(executor.submit(self.fetch_page, link, page_size, headers, cache))
+            if self.matched is not None and self.matched > limit:
+                logger.warning('There are more items found (%s) than the limit (%s) provided.' % (self.matched, limit))
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def iter_items(self, limit=10000, page_limit=500, headers=None, prefetch=0, first_page_limit=None, cache=True):
+        """ Iterate over the Items of this search as each page is parsed, linked to their Collection """
+        collections = {}
+        for page in self.iter_pages(limit=limit, page_limit=page_limit, headers=headers, prefetch=prefetch,
+                                    first_page_limit=first_page_limit, cache=cache):
+            for item in page:
+                cid = item._data.get('collection', None)
+                if cid is not None:
+                    if cid not in collections:
+                        try:
+                            collections[cid] = self.collection(cid, headers=headers, cache=cache)
+                        except Exception:
+                            collections[cid] = None
+                    item._collection = collections[cid]
+                yield item
+
+    def items(self, limit=10000, page_limit=500, headers=None, prefetch=0, first_page_limit=None, count=False,
+              cache=True):
+        """ Return all of the Items and Collections for this search """
+        limit = self.limit or limit
+        # the matched count comes with the first page, a separate count request is opt-in
+        if count:
+            self.found(headers=headers, cache=cache)
+
+        items = list(self.iter_items(limit=limit, page_limit=page_limit, headers=headers, prefetch=prefetch,
+                                     first_page_limit=first_page_limit, cache=cache))
+        collections = {i._collection.id: i._collection for i in items if i._collection is not None}
         logger.debug(f"Found: {len(items)}")
-        return ItemCollection(items, collections=collections)
+        return ItemCollection(items, collections=list(collections.values()))
@@ -5,3 +5,6 @@ from .catalog import Catalog
 from .collection import Collection
 from .item import Item
 from .itemcollection import ItemCollection
+from .itemstore import ItemStore
+from .downloader import Downloader
+from .table import ItemTable
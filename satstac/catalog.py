@@ -1,11 +1,20 @@
 import json
+import logging
 import os
 
+from collections import OrderedDict
 from .version import __version__
 from .thing import Thing, STACError
 
+logger = logging.getLogger(__name__)
+
 STAC_VERSION = os.getenv('STAC_VERSION', '1.0.0-beta.2')
 
+# number of open catalogs kept by a CatalogCache
+CATALOG_CACHE_SIZE = int(os.getenv('STAC_CATALOG_CACHE_SIZE', 4096))
+# number of catalogs and Items opened concurrently when crawling a catalog
+CRAWL_WORKERS = int(os.getenv('STAC_CRAWL_WORKERS', 8))
+
 
 class Catalog(Thing):
 
@@ -36,38 +45,40 @@ class Catalog(Thing):
         })
         return cls(kwargs, root=root)
 
-    def children(self):
-        """ Get child links """
-        # TODO = should this be tested if Collection and return mix of Catalogs and Collections?
-        for l in self.links('child'):
-            yield Catalog.open(l)
-
-    def catalogs(self):
-        """ Recursive get all catalogs within this Catalog """
-        for cat in self.children():
-            for subcat in cat.children():
-                yield subcat
-                yield from subcat.catalogs()
-            yield cat
-
-    def collections(self):
-        """ Recursively get all collections within this Catalog """
-        for cat in self.children():
-            if 'extent' in cat._data.keys():
-                yield Collection.open(cat.filename)
-                # TODO - keep going? if other Collections can appear below a Collection
-            else:
-                yield from cat.collections()
-
-    def items(self):
-        """ Recursively get all items within this Catalog """
-        for item in self.links('item'):
-            yield Item.open(item)
-        for child in self.children():
-            yield from child.items()
-
-    def add_catalog(self, catalog, basename='catalog'):
-        """ Add a catalog to this catalog """
+    def walk(self, workers=CRAWL_WORKERS, max_depth=None, items=False, prune=None, filter=None,
+             depth_first=False):
+        """ Iterate over the catalogs (and Items) below this Catalog, see Crawler """
+        crawler = Crawler(workers=workers, max_depth=max_depth, items=items, prune=prune, filter=filter,
+                          depth_first=depth_first)
+        for depth, thing in crawler.crawl(self):
+            yield thing
+
+    def children(self, workers=CRAWL_WORKERS):
+        """ Get child catalogs (and Collections), opened concurrently """
+        return self.walk(workers=workers, max_depth=1)
+
+    def catalogs(self, workers=CRAWL_WORKERS, max_depth=None, bbox=None, datetime=None):
+        """ Recursively get all catalogs within this Catalog, skipping Collections outside bbox and datetime """
+        outside = lambda cat: not intersects(cat, bbox=bbox, datetime=datetime)
+        return self.walk(workers=workers, max_depth=max_depth, prune=outside,
+                         filter=lambda cat: not outside(cat))
+
+    def collections(self, workers=CRAWL_WORKERS, max_depth=None, bbox=None, datetime=None):
+        """ Recursively get all collections within this Catalog (overlapping bbox and datetime) """
+        # TODO - keep going? if other Collections can appear below a Collection
+        # a catalog of another extent is not descended into
+        prune = lambda cat: isinstance(cat, Collection) or not intersects(cat, bbox=bbox, datetime=datetime)
+        keep = lambda cat: isinstance(cat, Collection) and intersects(cat, bbox=bbox, datetime=datetime)
+        return self.walk(workers=workers, max_depth=max_depth, prune=prune, filter=keep)
+
+    def items(self, workers=CRAWL_WORKERS, max_depth=None, bbox=None, datetime=None):
+        """ Recursively get all items within this Catalog (overlapping bbox and datetime) """
+        outside = lambda cat: not intersects(cat, bbox=bbox, datetime=datetime)
+        keep = lambda thing: isinstance(thing, Item) and intersects(thing, bbox=bbox, datetime=datetime)
+        return self.walk(workers=workers, max_depth=max_depth, items=True, prune=outside, filter=keep)
+
+    def add_catalog(self, catalog, basename='catalog', save=True):
+        """ Add a catalog to this catalog (only linking them, and setting its filename, if not save) """
         if self.filename is None:
             raise STACError('Save catalog before adding sub-catalogs')
         # add new catalog child link
@@ -78,21 +89,87 @@ class Catalog(Thing):
         root_link = root_links[0] if len(root_links) > 0 else self.filename
         root_path = os.path.dirname(root_link)
         self.add_link('child', child_link)
-        self.save()
         # strip self, parent, child links from catalog and add new links
         catalog.clean_hierarchy()
         catalog.add_link('root', os.path.relpath(root_link, child_path))
         catalog.add_link('parent', os.path.relpath(self.filename, child_path))
-        # create catalog file
-        catalog.save(filename=child_fname)
+        catalog.filename = child_fname
+        if save:
+            self.save()
+            # create catalog file
+            catalog.save()
         return self
 
-    def add_collection(self, catalog, basename='collection'):
+    def add_collection(self, catalog, basename='collection', save=True):
         """ Add a collection to this catalog """
-        return self.add_catalog(catalog, basename=basename)
+        return self.add_catalog(catalog, basename=basename, save=save)
+
+
+class CatalogCache(object):
+    """ Catalogs opened by resolved filename, saving the changed ones in batches
+
+    Changed catalogs are saved when evicted (least recently used first, beyond max_size
+    catalogs) or on flush(). Unchanged catalogs are opened again if their file changed.
+    """
+
+    def __init__(self, max_size=CATALOG_CACHE_SIZE):
+        self.max_size = max_size
+        self._catalogs = OrderedDict()
+        # (mtime, size) of the files as last read or saved
+        self._stats = {}
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._catalogs)
+
+    @staticmethod
+    def stat(fname):
+        try:
+            st = os.stat(fname)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def open(self, filename):
+        """ Get catalog by filename, opening it if not already open (or changed since) """
+        fname = os.path.abspath(filename)
+        if fname in self._catalogs and (fname in self._dirty or self._stats[fname] == self.stat(fname)):
+            self._catalogs.move_to_end(fname)
+            return self._catalogs[fname]
+        return self.add(Catalog.open(fname))
+
+    def add(self, catalog):
+        """ Add an open (or just saved) catalog """
+        fname = os.path.abspath(catalog.filename)
+        self._catalogs[fname] = catalog
+        self._catalogs.move_to_end(fname)
+        self._stats[fname] = self.stat(fname)
+        while len(self._catalogs) > self.max_size:
+            fname, cat = self._catalogs.popitem(last=False)
+            del self._stats[fname]
+            if fname in self._dirty:
+                self._dirty.remove(fname)
+                cat.save()
+        return catalog
+
+    def changed(self, catalog):
+        """ Mark catalog as changed, to be saved by flush() """
+        fname = os.path.abspath(catalog.filename)
+        if fname not in self._catalogs:
+            self.add(catalog)
+        self._dirty.add(fname)
+
+    def flush(self):
+        """ Save all changed catalogs """
+        logger.debug('Saving %s catalogs' % len(self._dirty))
+        for fname in self._dirty:
+            self._catalogs[fname].save()
+            self._stats[fname] = self.stat(fname)
+        self._dirty.clear()
 
 
 # import and end of module prevents problems with circular dependencies.
 # Catalogs use Items and Items use Collections (which are Catalogs)
 from .item import Item
 from .collection import Collection
+from .crawler import Crawler, intersects
@@ -1,24 +1,131 @@
+import copy
 import logging
-import functools
 import os
+import threading
+import time
 
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
-from .catalog import Catalog
+from .catalog import Catalog, CatalogCache
 from satstac import STACError, utils
 
 logger = logging.getLogger(__name__)
 
+# number of Collections kept by the registry, and seconds before they are loaded again
+COLLECTION_CACHE_SIZE = int(os.getenv('STAC_COLLECTION_CACHE_SIZE', 256))
+COLLECTION_CACHE_TTL = int(os.getenv('STAC_COLLECTION_CACHE_TTL', 3600))
+# number of threads saving Items in Collection.add_items
+ITEM_WORKERS = int(os.getenv('STAC_ITEM_WORKERS', 8))
+
+
+class CollectionRegistry(object):
+    """ Thread-safe LRU cache of Collections by URL (or absolute filename), with expiry
+
+    Local files are loaded again when their modification time changes.
+    """
+
+    def __init__(self, max_size=COLLECTION_CACHE_SIZE, ttl=COLLECTION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # one lock per key being loaded, so concurrent requests for a Collection load it once
+        self._loading = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(filename):
+        """ Registry key and version stamp (modification time of local files) for a filename or URL """
+        if filename[0:4] == 'http':
+            return filename, None
+        filename = os.path.abspath(filename)
+        try:
+            return filename, os.path.getmtime(filename)
+        except OSError:
+            return filename, None
+
+    def get(self, filename):
+        """ Get Collection from the registry, None if not loaded or expired """
+        key, stamp = self.key(filename)
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            collection, expires, _stamp = entry
+            if expires < time.time() or _stamp != stamp:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return collection
+
+    def put(self, filename, collection):
+        """ Add Collection to the registry, evicting the least recently used """
+        key, stamp = self.key(filename)
+        with self._lock:
+            self._entries[key] = (collection, time.time() + self.ttl, stamp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return collection
+
+    def load(self, filename, loader):
+        """ Get Collection from the registry, or call loader() and add the result """
+        collection = self.get(filename)
+        if collection is not None:
+            return collection
+        key = self.key(filename)[0]
+        with self._lock:
+            lock = self._loading.setdefault(key, threading.Lock())
+        with lock:
+            # another thread may have loaded it meanwhile
+            collection = self.get(filename)
+            if collection is None:
+                collection = self.put(filename, loader())
+        with self._lock:
+            self._loading.pop(key, None)
+        return collection
+
+    def clear(self):
+        """ Remove all Collections """
+        with self._lock:
+            self._entries.clear()
+
+
+_registry = CollectionRegistry()
+
+
+def get_registry():
+    """ Get the Collection registry shared by all searches and Items """
+    return _registry
+
 
 class Collection(Catalog):
 
-    '''
     def __init__(self, *args, **kwargs):
-        """ Initialize a scene object """
+        """ Initialize a collection """
         super(Collection, self).__init__(*args, **kwargs)
-        # determine common_name to asset mapping
-        # it will map if an asset contains only a single band
-    '''
+        # sub-catalogs opened while adding Items, see parent_catalog
+        self._catalogs = None
+        # saves Items added within a transaction
+        self._executor = None
+        self._saves = deque()
+        self._max_saves = 0
+
+    @classmethod
+    def open(cls, filename):
+        """ Open an existing Collection, a copy of the one parsed once and shared through the registry """
+        shared = cls.open_shared(filename)
+        return cls(copy.deepcopy(shared._data), filename=shared.filename)
+
+    @classmethod
+    def open_shared(cls, filename):
+        """ Open an existing Collection shared through the registry, not to be changed """
+        return get_registry().load(filename, lambda: super(Collection, cls).open(filename))
 
     @property
     def title(self):
@@ -49,9 +156,10 @@ class Collection(Catalog):
         """ Get dictionary of summaries """
         return self._data.get('summaries', {})
 
-    @functools.lru_cache()
     def parent_catalog(self, item, path_template):
-        """ Given relative filename to a new Item find parent catalog """
+        """ Given relative filename to a new Item find (or create) its parent catalog """
+        if self._catalogs is None:
+            self._catalogs = CatalogCache()
         cat = self
         path = item.get_path(os.path.dirname(path_template))
         var_names = [v.strip('$').strip('{}') for v in utils.splitall(path_template)]
@@ -59,18 +167,26 @@ class Collection(Catalog):
             fname = os.path.join(os.path.join(cat.path, d), 'catalog.json')
             # open existing sub-catalog or create new one
             try:
-                subcat = Catalog.open(fname)
+                subcat = self._catalogs.open(fname)
             except STACError as err:
-                # create a new sub-catalog
+                # create a new sub-catalog, saved right away or at the end of a transaction
                 subcat = self.create(id=d, description='%s catalog' % var_names[i])
-                subcat.save(filename=fname)
-                # add the sub-catalog to this catalog
-                cat.add_catalog(subcat)
+                if self._executor is None:
+                    subcat.save(filename=fname)
+                    # add the sub-catalog to this catalog
+                    cat.add_catalog(subcat)
+                    if cat is not self:
+                        self._catalogs.add(cat)
+                    self._catalogs.add(subcat)
+                else:
+                    cat.add_catalog(subcat, save=False)
+                    self._catalogs.changed(cat)
+                    self._catalogs.changed(subcat)
             cat = subcat
-        return cat.filename
+        return cat
 
     def add_item(self, item, filename_template='${id}.json'):
-        """ Add an item to this collection """
+        """ Add an item to this collection (catalogs linking to it are saved at the end of a transaction) """
         start = datetime.now()
         if self.filename is None:
             raise STACError('Save catalog before adding items')
@@ -79,11 +195,15 @@ class Collection(Catalog):
         item_path = os.path.dirname(item_fname)
         root_link = self.links('root')[0]
         #root_path = os.path.dirname(root_link)
-        parent = Catalog.open(self.parent_catalog(item, filename_template))
+        parent = self.parent_catalog(item, filename_template)
         
         # create link to item
         parent.add_link('item', os.path.relpath(item_fname, parent.path))
-        parent.save()
+        if self._executor is None:
+            parent.save()
+            self._catalogs.add(parent)
+        else:
+            self._catalogs.changed(parent)
 
         # create links from item
         item.clean_hierarchy()
@@ -94,7 +214,46 @@ class Collection(Catalog):
 
         # save item
         
-        item.save(filename=item_fname)
+        if self._executor is None:
+            item.save(filename=item_fname)
+        else:
+            self.save_later(item, item_fname)
         logger.debug('Added %s in %s seconds' % (item.filename, datetime.now()-start))
         
         return self
+
+    def save_later(self, item, filename):
+        """ Save Item in a worker thread, waiting for earlier saves if too many are pending """
+        while len(self._saves) >= self._max_saves:
+            self._saves.popleft().result()
+        self._saves.append(self._executor.submit(item.save, filename=filename))
+
+    def add_items(self, items, filename_template='${id}.json', workers=ITEM_WORKERS):
+        """ Add Items (any iterable) to this collection, within a transaction """
+        with self.transaction(workers=workers):
+            for item in items:
+                self.add_item(item, filename_template=filename_template)
+        return self
+
+    @contextmanager
+    def transaction(self, workers=ITEM_WORKERS):
+        """ Add Items within the block, saving Items with workers threads and each changed catalog once at the end """
+        if self._executor is not None:
+            # already in a transaction
+            yield self
+            return
+        if self._catalogs is None:
+            self._catalogs = CatalogCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._max_saves = workers * 4
+        try:
+            yield self
+        finally:
+            try:
+                while self._saves:
+                    self._saves.popleft().result()
+            finally:
+                self._executor.shutdown()
+                self._executor = None
+                self._saves.clear()
+                self._catalogs.flush()
@@ -0,0 +1,123 @@
+import copy
+import datetime
+import logging
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .catalog import Catalog, CRAWL_WORKERS
+from .collection import Collection, get_registry
+from .item import Item
+from .utils import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def utc(value):
+    """ Parse a datetime string (None for '..' or empty), as UTC if it has no timezone """
+    if value in [None, '', '..']:
+        return None
+    dt = parse_datetime(value) if isinstance(value, str) else value
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=datetime.timezone.utc)
+
+
+def intersects(thing, bbox=None, datetime=None):
+    """ True if the extent of a Collection, or the bbox and datetime of an Item, overlaps bbox
+        (min lon, min lat, max lon, max lat) and datetime ('start/end', '..' for an open end).
+        Catalogs without an extent always overlap """
+    if isinstance(thing, Item):
+        _bbox = thing._data.get('bbox', None)
+        dt = thing._data.get('properties', {}).get('datetime', None)
+        interval = [dt, dt]
+    elif 'extent' in thing._data:
+        extent = thing._data['extent'] or {}
+        # STAC 1.0 nests the first bbox and interval, 0.x has them directly
+        _bbox = extent.get('spatial', None)
+        if isinstance(_bbox, dict):
+            _bbox = (_bbox.get('bbox') or [None])[0]
+        interval = extent.get('temporal', None)
+        if isinstance(interval, dict):
+            interval = (interval.get('interval') or [None])[0]
+    else:
+        return True
+    if bbox is not None and _bbox:
+        # 3D bboxes have the elevation after the lon and lat
+        n = len(_bbox) // 2
+        if _bbox[0] > bbox[2] or _bbox[n] < bbox[0] or _bbox[1] > bbox[3] or _bbox[n + 1] < bbox[1]:
+            return False
+    if datetime is not None and interval:
+        start, end = (datetime.split('/') + [None])[0:2] if '/' in datetime else [datetime, datetime]
+        start, end = utc(start), utc(end)
+        _start, _end = utc(interval[0]), utc(interval[1])
+        if (end is not None and _start is not None and _start > end) or \
+           (start is not None and _end is not None and _end < start):
+            return False
+    return True
+
+
+class Crawler(object):
+    """ Walk the catalogs and Items below a catalog, opening them on a pool of worker threads
+
+    Links are opened ahead, up to workers * 2 at a time, and yielded as a generator in
+    breadth first (or, up to the links opened ahead, depth first) order. Each href is opened once. Catalogs for which
+    prune(catalog) is True are yielded but not descended into, so their subtree is never
+    opened, and only what filter(thing) is True for is yielded.
+    """
+
+    def __init__(self, workers=CRAWL_WORKERS, max_depth=None, items=False, prune=None, filter=None,
+                 depth_first=False):
+        """ Crawl catalogs up to max_depth levels below the start (and their Items if items) """
+        self.workers = workers
+        self.max_depth = max_depth
+        self.items = items
+        self.prune = prune
+        self.filter = filter
+        self.depth_first = depth_first
+        self.opened = 0
+
+    @staticmethod
+    def open_catalog(href):
+        """ Open a catalog, as a Collection if it has an extent """
+        cat = Catalog.open(href)
+        if 'extent' in cat._data:
+            # share a copy with Collection.open rather than reading it again, the one yielded is private
+            get_registry().put(href, Collection(copy.deepcopy(cat._data), filename=cat.filename))
+            return Collection(cat._data, filename=cat.filename)
+        return cat
+
+    def links(self, catalog, depth):
+        """ (depth, opener, href) of the links to crawl from catalog at depth """
+        if self.max_depth is not None and depth >= self.max_depth:
+            return []
+        if depth > 0 and self.prune is not None and self.prune(catalog):
+            return []
+        links = [(depth + 1, self.open_catalog, l) for l in catalog.links('child')]
+        if self.items:
+            links += [(depth + 1, Item.open, l) for l in catalog.links('item')]
+        return links
+
+    def crawl(self, catalog):
+        """ Yield (depth, Catalog, Collection or Item) for everything below catalog """
+        # links to open, a stack when depth first
+        links = self.links(catalog, 0)
+        queue = deque(reversed(links) if self.depth_first else links)
+        visited = set(l[2] for l in links)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while queue or pending:
+                while queue and len(pending) < self.workers * 2:
+                    depth, opener, href = queue.pop() if self.depth_first else queue.popleft()
+                    pending.append((depth, executor.submit(opener, href)))
+                depth, future = pending.popleft()
+                thing = future.result()
+                self.opened += 1
+                if isinstance(thing, Catalog):
+                    links = [l for l in self.links(thing, depth) if l[2] not in visited]
+                    visited.update(l[2] for l in links)
+                    queue.extend(reversed(links) if self.depth_first else links)
+                if self.filter is None or self.filter(thing):
+                    yield depth, thing
+        finally:
+            for depth, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_WORKERS = int(os.getenv('STAC_DOWNLOAD_WORKERS', 4))
+# concurrent connections to any one host
+DOWNLOAD_HOST_CONNECTIONS = int(os.getenv('STAC_DOWNLOAD_HOST_CONNECTIONS', 4))
+
+
+class Downloader(object):
+    """ Download Item assets on a pool of worker threads, with a cap on connections per host """
+
+    def __init__(self, workers=DOWNLOAD_WORKERS, host_connections=DOWNLOAD_HOST_CONNECTIONS, progress=None):
+        """ Initialize a Downloader, progress is called with the Downloader after each file """
+        self.workers = workers
+        self.host_connections = host_connections
+        self.progress = progress
+        self.files = 0
+        self.completed = 0
+        self.failed = 0
+        self.bytes = 0
+        self.start = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        # bound the queue of submitted downloads so streaming callers do not pile up Items
+        self._queue = threading.BoundedSemaphore(workers * 4)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start
+
+    @property
+    def throughput(self):
+        """ Aggregate download rate in bytes per second """
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return '%s/%s files (%s failed), %.1f MB at %.2f MB/s' % (
+            self.completed, self.files, self.failed, self.bytes / 1e6, self.throughput / 1e6)
+
+    def host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.host_connections)
+            return self._hosts[host]
+
+    def add_bytes(self, nbytes):
+        with self._lock:
+            self.bytes += nbytes
+
+    def _download(self, item, key, kwargs):
+        try:
+            filename = None
+            try:
+                asset = item.asset(key)
+                if asset is not None:
+                    with self.host_semaphore(asset['href']):
+                        filename = item.download(key, progress=self.add_bytes, **kwargs)
+            except Exception as e:
+                # errors Item.download does not catch itself, counted as failed rather than left in the Future
+                logger.error('Unable to download %s of %s: %s' % (key, item.id, str(e)))
+                logger.debug(traceback.format_exc())
+            with self._lock:
+                self.completed += 1
+                if filename is None:
+                    self.failed += 1
+            logger.info('Downloaded %s' % self)
+            if self.progress is not None:
+                self.progress(self)
+            return filename
+        finally:
+            self._queue.release()
+
+    def submit(self, item, key, **kwargs):
+        """ Queue download of the asset `key` of item, returns a Future of the filename """
+        self._queue.acquire()
+        with self._lock:
+            self.files += 1
+        return self._executor.submit(self._download, item, key, kwargs)
+
+    def download(self, items, keys=None, **kwargs):
+        """ Download assets (all if keys is None) of items, returning the list of filenames of each Item """
+        futures = []
+        for item in items:
+            _keys = item.assets.keys() if keys is None else keys
+            futures.append([self.submit(item, key, **kwargs) for key in _keys])
+        return [[f.result() for f in fs] for fs in futures]
+
+    def close(self):
+        """ Wait for queued downloads and stop the workers """
+        self._executor.shutdown(wait=True)
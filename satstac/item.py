@@ -5,7 +5,6 @@ import traceback
 
 from string import Formatter, Template
 from datetime import datetime
-from dateutil.parser import parse as dateparse
 
 from satstac import __version__, STACError, Thing, utils
 
@@ -23,6 +22,8 @@ class Item(Thing):
         self._assets_by_common_name = None
         # collection instance
         self._collection = kwargs.pop('collection', None)
+        # (datetime string, parsed datetime) of the last parse
+        self._datetime = None
         # TODO = allow passing in of collection (needed for FC catalogs)
 
     def collection(self):
@@ -33,7 +34,7 @@ class Item(Thing):
                 return None
             link = self.links('collection')
             if len(link) == 1:
-                self._collection = Collection.open(link[0])
+                self._collection = Collection.open_shared(link[0])
         return self._collection
 
     @property
@@ -56,7 +57,11 @@ class Item(Thing):
 
     @property
     def datetime(self):
-        return dateparse(self['datetime'])
+        """ Parsed datetime property, cached until the datetime string changes """
+        value = self['datetime']
+        if self._datetime is None or self._datetime[0] != value:
+            self._datetime = (value, utils.parse_datetime(value))
+        return self._datetime[1]
 
     @property
     def geometry(self):
@@ -116,16 +121,20 @@ class Item(Thing):
                 subs[key] = self[key.replace('__colon__', ':')]
         return Template(_template).substitute(**subs).replace('__colon__', ':')
 
-    def download_assets(self, keys=None, **kwargs):
-        """ Download multiple assets """
+    def download_assets(self, keys=None, workers=1, **kwargs):
+        """ Download multiple assets, on `workers` threads if more than 1 """
         if keys is None:
             keys = self._data['assets'].keys()
+        if workers > 1:
+            with Downloader(workers=workers) as downloader:
+                return downloader.download([self], keys=keys, **kwargs)[0]
         filenames = []
         for key in keys:
             filenames.append(self.download(key, **kwargs))
         return filenames
 
-    def download(self, key, overwrite=False, filename_template=FILENAME_TEMPLATE, requester_pays=False, headers={}):
+    def download(self, key, overwrite=False, filename_template=FILENAME_TEMPLATE, requester_pays=False, headers={},
+                 progress=None):
         """ Download this key (e.g., a band, or metadata file) from the scene """
         asset = self.asset(key)
         if asset is None:
@@ -133,9 +142,12 @@ class Item(Thing):
 
         ext = os.path.splitext(asset['href'])[1]
         filename = self.get_path(filename_template) + '_' + key + ext
+        # downloads are renamed into place once complete, so an existing file is a complete one
         if not os.path.exists(filename) or overwrite:
+            checksum = asset.get('file:checksum', asset.get('checksum:multihash'))
             try:
-                utils.download_file(asset['href'], filename=filename, requester_pays=requester_pays, headers=headers)
+                utils.download_file(asset['href'], filename=filename, requester_pays=requester_pays, headers=headers,
+                                    progress=progress, checksum=checksum)
             except Exception as e:
                 filename = None
                 logger.error('Unable to download %s: %s' % (asset['href'], str(e)))
@@ -175,3 +187,4 @@ class Item(Thing):
 # import and end of module prevents problems with circular dependencies.
 # Catalogs use Items and Items use Collections (which are Catalogs)
 from .collection import Collection
+from .downloader import Downloader
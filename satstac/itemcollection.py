@@ -1,13 +1,13 @@
 import json
-import os.path as op
-import requests
 
 from logging import getLogger
 from .catalog import STAC_VERSION
 from .collection import Collection
+from .downloader import Downloader
 from .item import Item
+from .streaming import iter_members, open_stream, FeatureCollectionWriter
 from .thing import STACError
-from .utils import terminal_calendar, get_s3_signed_url
+from .utils import terminal_calendar, get_s3_signed_url, get_session
 
 logger = getLogger(__name__)
 
@@ -19,9 +19,12 @@ class ItemCollection(object):
         """ Initialize with a list of Item objects """
         self._collections = collections
         self._items = items
-        # link Items to their Collections
+        # lazily built {value: [Items]} lookups by key, cleared when the Items change
+        self._indexes = {}
+        self._collections_by_id = None
+        # link Items to their Collections (an ItemStore links Items as it reads them)
         cols = {c.id: c for c in self._collections}
-        for i in self._items:
+        for i in ([] if isinstance(self._items, ItemStore) else self._items):
             # backwards compatible to STAC 0.6.0 where collection is in properties
             col = i._data.get('collection', None)
             if col is not None:
@@ -31,7 +34,7 @@ class ItemCollection(object):
     @classmethod
     def open_remote(self, url, headers={}):
         """ Open remote file """
-        resp = requests.get(url, headers=headers)
+        resp = get_session().get(url, headers=headers)
         if resp.status_code == 200:
             dat = resp.text
         else:
@@ -43,6 +46,10 @@ class ItemCollection(object):
         """ Load an Items class from a GeoJSON FeatureCollection """
         """ Open an existing JSON data file """
         logger.debug('Opening %s' % filename)
+        if filename.endswith(BINARY_EXTENSION):
+            # memory-mapped, Items are read on access
+            store = ItemStore(filename)
+            return cls(store, collections=store.collections)
         if filename[0:5] == 'https':
             try:
                 data = cls.open_remote(filename)
@@ -51,15 +58,50 @@ class ItemCollection(object):
                 url, headers = get_s3_signed_url(filename)
                 data = cls.open_remote(url, headers)
         else:
-            if op.exists(filename):
-                data = open(filename).read()
-                data = json.loads(data)
-            else:
-                raise STACError('%s does not exist locally' % filename)
+            with open_stream(filename) as f:
+                data = json.load(f)
         collections = [Collection(col) for col in data.get('collections', [])]
         items = [Item(feature) for feature in data['features']]
         return cls(items, collections=collections)
 
+    @classmethod
+    def iter_open(cls, filename):
+        """ Iterate over the Items of a GeoJSON FeatureCollection, parsing one feature at a time """
+        if filename.endswith(BINARY_EXTENSION):
+            with ItemStore(filename) as store:
+                yield from store
+            return
+        collections = {}
+        trailing = False
+        for key, value in iter_members(filename, stream_key='features', keys=['collections']):
+            if key == 'collections':
+                collections.update({c['id']: Collection(c) for c in value})
+            elif key == 'features':
+                item = Item(value)
+                col = item._data.get('collection', None)
+                if col is not None and col not in collections and not trailing:
+                    # Collections listed after the features (as by geojson()) are read first
+                    collections.update(cls.trailing_collections(filename))
+                    trailing = True
+                if col in collections:
+                    item._collection = collections[col]
+                yield item
+
+    @staticmethod
+    def trailing_collections(filename):
+        """ Collections listed after the features of a local file, by id (none for remote files) """
+        if filename[0:5] == 'https':
+            return {}
+        collections = {}
+        seen_features = False
+        # only the collections are kept, the features are parsed and dropped one at a time
+        for key, value in iter_members(filename, stream_key='features', keys=['collections']):
+            if key == 'features':
+                seen_features = True
+            elif seen_features:
+                collections.update({c['id']: Collection(c) for c in value})
+        return collections
+
     @classmethod
     def load(cls, *args, **kwargs):
         """ Load an Items class from a GeoJSON FeatureCollection """
@@ -73,13 +115,37 @@ class ItemCollection(object):
     def __getitem__(self, index):
         return self._items[index]
 
+    def index(self, key):
+        """ Items grouped by 'id', 'date' or a property key, built on first use (None if values are unhashable) """
+        if key not in self._indexes:
+            index = {}
+            try:
+                for i in self._items:
+                    val = i.id if key == 'id' else i.date if key == 'date' else i[key]
+                    index.setdefault(val, []).append(i)
+            except TypeError:
+                index = None
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def item(self, id):
+        """ Get Item by id """
+        if isinstance(self._items, ItemStore):
+            return self._items.get(id)
+        items = self.index('id').get(id, [])
+        return items[0] if len(items) > 0 else None
+
     def dates(self):
         """ Get sorted list of dates for all scenes """
-        return sorted(list(set([s.date for s in self._items])))
+        return sorted(self.index('date').keys())
 
     def collection(self, id):
         """ Get collection records for this list of scenes """
-        cols = [c for c in self._collections if c.id == id]
+        if self._collections_by_id is None:
+            self._collections_by_id = {}
+            for c in self._collections:
+                self._collections_by_id.setdefault(c.id, []).append(c)
+        cols = self._collections_by_id.get(id, [])
         if len(cols) == 1:
             return cols[0]
         else:
@@ -88,20 +154,37 @@ class ItemCollection(object):
     def properties(self, key, date=None):
         """ Set of values for 'key' property in Items, for specific date if provided """
         if date is None:
+            index = self.index(key)
+            if index is not None:
+                return list(index.keys())
             return list(set([i[key] for i in self._items]))
         else:
-            return list(set([i[key] for i in self._items if i.date == date]))    
+            return list(set([i[key] for i in self.index('date').get(date, [])]))
+
+    def table(self, keys=[]):
+        """ Columnar ItemTable of these Items, loading keys up front (requires numpy) """
+        return ItemTable(self._items, keys=keys, collections=self._collections)
 
     def summary(self, params=[]):
         """ Print summary of all scenes """
         if len(params) == 0:
             params = ['date', 'id']
         txt = 'Items (%s):\n' % len(self._items)
-        txt += ''.join(['{:<25} '.format(p) for p in params]) + '\n'
+        txt += self.summary_header(params)
         for s in self._items:
-            txt += ''.join(['{:<25} '.format(s.get_path('${%s}' % p)) for p in params]) + '\n'
+            txt += self.summary_line(s, params)
         return txt
 
+    @staticmethod
+    def summary_header(params):
+        """ Column headers of a summary """
+        return ''.join(['{:<25} '.format(p) for p in params]) + '\n'
+
+    @staticmethod
+    def summary_line(item, params):
+        """ Summary row for one Item """
+        return ''.join(['{:<25} '.format(item.get_path('${%s}' % p)) for p in params]) + '\n'
+
     def calendar(self, group='platform'):
         """ Get calendar for dates """
         date_labels = {}
@@ -131,33 +214,52 @@ class ItemCollection(object):
         return txt
 
     def save(self, filename, **kwargs):
-        """ Save scene metadata """
-        with open(filename, 'w') as f:
-            f.write(json.dumps(self.geojson(**kwargs)))
+        """ Save scene metadata, in the binary ItemStore format if filename ends with .stacb """
+        if filename.endswith(BINARY_EXTENSION):
+            ItemStore.write(filename, self._items, collections=self._collections, **kwargs)
+            return
+        # Items are written one at a time, gzip compressed if filename ends with .gz
+        with FeatureCollectionWriter(filename, collections=self._collections, **self.metadata(**kwargs)) as writer:
+            for item in self._items:
+                writer.write(item)
 
-    def geojson(self, id='STAC', description='Single file STAC'):
-        """ Get Items as GeoJSON FeatureCollection """
-        features = [s._data for s in self._items]
-        geoj = {
+    @staticmethod
+    def metadata(id='STAC', description='Single file STAC'):
+        """ Top-level members of the single file STAC FeatureCollection, other than features and collections """
+        return {
             'id': id,
             'description': description,
             'stac_version': STAC_VERSION,
             'stac_extensions': ['single-file-stac'],
             'type': 'FeatureCollection',
-            'features': features,
-            'collections': [c._data for c in self._collections],
             'links': []
         }
+
+    def geojson(self, id='STAC', description='Single file STAC'):
+        """ Get Items as GeoJSON FeatureCollection """
+        geoj = self.metadata(id=id, description=description)
+        geoj['features'] = [s._data for s in self._items]
+        geoj['collections'] = [c._data for c in self._collections]
         return geoj
 
     def filter(self, key, values):
         """ Filter scenes on key matching value """
+        index = self.index(key)
         items = []
         for val in values:
-            items += list(filter(lambda x: x[key] == val, self._items))
+            if index is not None:
+                items += index.get(val, [])
+            else:
+                items += list(filter(lambda x: x[key] == val, self._items))
         self._items = items
+        self._indexes = {}
 
-    def download_assets(self, *args, **kwargs):
+    def download_assets(self, *args, workers=1, **kwargs):
+        """ Download assets of all Items, on `workers` threads if more than 1 """
+        if workers > 1:
+            with Downloader(workers=workers) as downloader:
+                fnames = downloader.download(self._items, *args, **kwargs)
+            return [f for f in fnames if len(f) > 0]
         filenames = []
         for i in self._items:
             fnames = i.download_assets(*args, **kwargs)
@@ -165,11 +267,20 @@ class ItemCollection(object):
                 filenames.append(fnames)
         return filenames
 
-    def download(self, *args, **kwargs):
-        """ Download all Items """
+    def download(self, key, workers=1, **kwargs):
+        """ Download all Items, on `workers` threads if more than 1 """
+        if workers > 1:
+            with Downloader(workers=workers) as downloader:
+                fnames = [f[0] for f in downloader.download(self._items, keys=[key], **kwargs)]
+            return [f for f in fnames if f is not None]
         dls = []
         for i in self._items:
-            fname = i.download(*args, **kwargs)
+            fname = i.download(key, **kwargs)
             if fname is not None:
                 dls.append(fname)
         return dls
+
+
+# import and end of module prevents problems with circular dependencies.
+from .itemstore import ItemStore, BINARY_EXTENSION
+from .table import ItemTable
@@ -0,0 +1,157 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+
+from logging import getLogger
+from .catalog import STAC_VERSION
+from .collection import Collection
+from .item import Item
+from .thing import STACError
+from .utils import mkdirp
+
+logger = getLogger(__name__)
+
+# filename extension of the binary format, see ItemStore
+BINARY_EXTENSION = '.stacb'
+
+MAGIC = b'SATSTAC1'
+# magic, count, compressed, metadata, record offsets, sorted id offsets, id blob and id order positions
+FOOTER = struct.Struct('<8sQQQQQQQ')
+OFFSET = struct.Struct('<Q')
+INDEX = struct.Struct('<I')
+# records are stored as compact JSON
+ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+class ItemStore(object):
+    """ Read-only, memory-mapped view of Items saved in the compact binary format
+
+    The file holds each Item as a separately compressed JSON record, the FeatureCollection
+    metadata (including Collections), a table of record offsets and a sorted table of ids,
+    so Item N or an Item by id is read without parsing the rest of the file.
+    """
+
+    def __init__(self, filename):
+        """ Open a binary Item file """
+        if not os.path.exists(filename):
+            raise STACError('%s does not exist locally' % filename)
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < len(MAGIC) + FOOTER.size or self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise STACError('%s is not a binary STAC Item file' % filename)
+        (magic, self._count, self._compressed, meta, self._offsets,
+         self._id_offsets, self._id_blob, self._id_order) = FOOTER.unpack_from(self._mm, len(self._mm) - FOOTER.size)
+        self.metadata = json.loads(self._decode(meta, self._offsets))
+        self.collections = [Collection(c) for c in self.metadata.get('collections', [])]
+        self._collections_by_id = {c.id: c for c in self.collections}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, table, n):
+        return OFFSET.unpack_from(self._mm, table + n * OFFSET.size)[0]
+
+    def _decode(self, start, end):
+        data = self._mm[start:end]
+        return zlib.decompress(data) if self._compressed else data
+
+    def __getitem__(self, n):
+        """ Item N (or list of Items for a slice) """
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(self._count))]
+        if n < 0:
+            n += self._count
+        if n < 0 or n >= self._count:
+            raise IndexError('Item index out of range')
+        data = json.loads(self._decode(self._offset(self._offsets, n), self._offset(self._offsets, n + 1)))
+        item = Item(data)
+        col = data.get('collection', None)
+        if col in self._collections_by_id:
+            item._collection = self._collections_by_id[col]
+        return item
+
+    def __iter__(self):
+        for n in range(self._count):
+            yield self[n]
+
+    def get(self, id):
+        """ Get Item by id (binary search of the sorted id table), None if not found """
+        key = id.encode('utf-8')
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._offset(self._id_offsets, mid)
+            end = self._offset(self._id_offsets, mid + 1)
+            val = self._mm[self._id_blob + start:self._id_blob + end]
+            if val < key:
+                lo = mid + 1
+            elif val > key:
+                hi = mid
+            else:
+                return self[INDEX.unpack_from(self._mm, self._id_order + mid * INDEX.size)[0]]
+        return None
+
+    def geojson(self):
+        """ Get Items as GeoJSON FeatureCollection """
+        geoj = dict(self.metadata)
+        geoj['features'] = [i._data for i in self]
+        return geoj
+
+    @classmethod
+    def write(cls, filename, items, collections=[], id='STAC', description='Single file STAC', compress=True):
+        """ Write Items (any iterable, consumed once) and Collections to a binary Item file """
+        mkdirp(os.path.dirname(filename))
+        pack = zlib.compress if compress else bytes
+        offsets = []
+        ids = []
+        cols = {c.id: c for c in collections}
+        with open(filename, 'wb') as f:
+            f.write(MAGIC)
+            for item in items:
+                offsets.append(f.tell())
+                ids.append(item.id.encode('utf-8'))
+                f.write(pack(ENCODER.encode(item._data).encode('utf-8')))
+                if item._collection is not None:
+                    cols.setdefault(item._collection.id, item._collection)
+            meta = f.tell()
+            offsets.append(meta)
+            f.write(pack(ENCODER.encode({
+                'id': id,
+                'description': description,
+                'stac_version': STAC_VERSION,
+                'stac_extensions': ['single-file-stac'],
+                'type': 'FeatureCollection',
+                'collections': [c._data for c in cols.values()],
+                'links': []
+            }).encode('utf-8')))
+            # record offsets, the last two bound the metadata record
+            offsets.append(f.tell())
+            f.write(b''.join(OFFSET.pack(o) for o in offsets))
+            order = sorted(range(len(ids)), key=ids.__getitem__)
+            id_offsets = f.tell()
+            pos = 0
+            for n in order:
+                f.write(OFFSET.pack(pos))
+                pos += len(ids[n])
+            f.write(OFFSET.pack(pos))
+            id_blob = f.tell()
+            f.write(b''.join(ids[n] for n in order))
+            id_order = f.tell()
+            f.write(b''.join(INDEX.pack(n) for n in order))
+            f.write(FOOTER.pack(MAGIC, len(ids), int(compress), meta, offsets[-1], id_offsets, id_blob, id_order))
+        logger.debug('Saved %s Items to %s' % (len(ids), filename))
+        return filename
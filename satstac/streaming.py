@@ -0,0 +1,203 @@
+import codecs
+import gzip
+import json
+import os
+
+from logging import getLogger
+from .thing import STACError
+from .utils import get_s3_signed_url, get_session, mkdirp
+
+logger = getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+DELIMITERS = WHITESPACE + ',:]}'
+# files ending with this are gzip compressed
+GZIP_EXTENSION = '.gz'
+
+
+def open_stream(filename):
+    """ Open a local or remote JSON file (gzip compressed if ending with .gz) as a binary file-like object """
+    if filename[0:5] == 'https':
+        resp = get_session().get(filename, stream=True)
+        if resp.status_code != 200:
+            # try signed URL
+            url, headers = get_s3_signed_url(filename)
+            resp = get_session().get(url, headers=headers, stream=True)
+        if resp.status_code != 200:
+            raise STACError('Unable to open %s' % filename)
+        resp.raw.decode_content = True
+        f = resp.raw
+    elif not os.path.exists(filename):
+        raise STACError('%s does not exist locally' % filename)
+    else:
+        f = open(filename, 'rb')
+    return gzip.GzipFile(fileobj=f) if filename.endswith(GZIP_EXTENSION) else f
+
+
+def open_output(filename, compress=None):
+    """ Open a local file for writing text, gzip compressed if compress (default: filename ends with .gz) """
+    mkdirp(os.path.dirname(filename))
+    if compress is None:
+        compress = filename.endswith(GZIP_EXTENSION)
+    if compress:
+        return gzip.open(filename, 'wt', encoding='utf-8')
+    return open(filename, 'w')
+
+
+def iter_members(filename, stream_key='features', keys=[]):
+    """ Incrementally parse the JSON object in filename
+
+    Yields (stream_key, element) for each element of the stream_key array, one at a
+    time, and (key, value) for the other top-level members listed in keys.
+    """
+    f = open_stream(filename)
+    try:
+        chunks = iter(lambda: f.read(STREAM_CHUNK_SIZE), b'')
+        for key, value in JSONStreamReader(chunks).members(stream_key):
+            if key == stream_key or key in keys:
+                yield key, value
+    finally:
+        f.close()
+
+
+class JSONStreamReader(object):
+    """ Incremental JSON object reader over chunks of UTF-8 bytes, decoding each value with the C json decoder """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """ Append the next chunk to the buffer, dropping what has been parsed """
+        chunk = next(self._chunks, None)
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        if chunk is None:
+            self.eof = True
+            self.buf += self._utf8.decode(b'', final=True)
+        else:
+            self.buf += self._utf8.decode(chunk)
+
+    def peek(self):
+        """ Next non-whitespace character, without consuming it ('' at the end) """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, chars):
+        """ Consume the next character, which must be one of chars """
+        c = self.peek()
+        if c == '' or c not in chars:
+            raise STACError('Invalid JSON: expected %s at "%s"' % (chars, self.buf[self.pos:self.pos + 20]))
+        self.pos += 1
+        return c
+
+    def value(self):
+        """ Decode the next complete JSON value """
+        self.peek()
+        while True:
+            try:
+                val, end = self._decoder.raw_decode(self.buf, self.pos)
+                # a value not followed by a delimiter (e.g. a number) may continue in the next chunk
+                if self.eof or (end < len(self.buf) and self.buf[end] in DELIMITERS):
+                    self.pos = end
+                    return val
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def members(self, stream_key=None):
+        """ Yield (key, value) for the members of an object, and each element of the stream_key array """
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == stream_key and self.peek() == '[':
+                self.expect('[')
+                if self.peek() == ']':
+                    self.expect(']')
+                else:
+                    while True:
+                        yield key, self.value()
+                        if self.expect(',]') == ']':
+                            break
+            else:
+                yield key, self.value()
+            if self.expect(',}') == '}':
+                return
+
+
+class FeatureCollectionWriter(object):
+    """ Write a GeoJSON FeatureCollection to a file one feature at a time
+
+    The other top-level members are written first. Collections passed in are written
+    before the features, so readers can link Items as they stream them, and the
+    Collections of written Items that were not passed in are written after them.
+    The file is written as filename.tmp and only renamed to filename by close(), so an
+    interrupted write (see discard, and leaving a with block on an exception) leaves no
+    unterminated file behind.
+    """
+
+    def __init__(self, filename, collections=None, **members):
+        self.filename = filename
+        self.count = 0
+        self._encoder = json.JSONEncoder()
+        # ids of the Collections written up front, and the Collections of the written Items not among them
+        self._written = set()
+        self._collections = {}
+        if collections is not None:
+            members['collections'] = [c._data for c in collections]
+            self._written = set(c.id for c in collections)
+        self._tmp = filename + '.tmp'
+        self._f = open_output(self._tmp, compress=filename.endswith(GZIP_EXTENSION))
+        self._f.write('{')
+        for key, val in members.items():
+            self._f.write('%s: %s, ' % (self._encoder.encode(key), self._encoder.encode(val)))
+        self._f.write('"features": [')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write(self, item):
+        """ Write an Item """
+        self._f.write((', ' if self.count else '') + self._encoder.encode(item._data))
+        self.count += 1
+        if item._collection is not None and item._collection.id not in self._written:
+            self._collections.setdefault(item._collection.id, item._collection)
+
+    def close(self):
+        """ Finish the FeatureCollection and close the file """
+        if self._f.closed:
+            return
+        self._f.write(']')
+        if self._collections:
+            self._f.write(', "collections": [%s]' % ', '.join(self._encoder.encode(c._data)
+                                                              for c in self._collections.values()))
+        self._f.write('}')
+        self._f.close()
+        os.replace(self._tmp, self.filename)
+        logger.debug('Saved %s Items to %s' % (self.count, self.filename))
+
+    def discard(self):
+        """ Close and remove the unfinished file """
+        if self._f.closed:
+            return
+        self._f.close()
+        os.remove(self._tmp)
@@ -0,0 +1,111 @@
+import datetime
+
+from .thing import STACError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ItemTable(object):
+    """ Columnar view of Item properties as NumPy arrays, for vectorized filtering, sorting and grouping
+
+    Masks are plain boolean arrays, e.g. table.filter(table['eo:cloud_cover'] < 20).
+    Tables and the ItemCollections built from them share the Item objects of the source.
+    """
+
+    def __init__(self, items, keys=[], collections=[]):
+        """ Initialize with a list of Items and the keys ('id', 'datetime', 'date' or properties) to load """
+        if numpy is None:
+            raise STACError('numpy is required for ItemTable')
+        self._items = list(items)
+        self._collections = collections
+        self.columns = {}
+        for key in keys:
+            self[key]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, key):
+        """ Array of values of key, loaded on first use """
+        if key not in self.columns:
+            self.columns[key] = self.column(self._items, key)
+        return self.columns[key]
+
+    @staticmethod
+    def column(items, key):
+        """ Typed array of key over items: datetime64 for dates, float64 (NaN if missing) for numbers """
+        if key in ['datetime', 'date']:
+            values = [i.datetime for i in items]
+            # numpy datetimes have no timezone, store UTC
+            values = [v.astimezone(datetime.timezone.utc).replace(tzinfo=None) if v.tzinfo else v for v in values]
+            return numpy.array(values, dtype='datetime64[ms]' if key == 'datetime' else 'datetime64[D]')
+        values = [i.id for i in items] if key == 'id' else [i[key] for i in items]
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) or v is None for v in values):
+            return numpy.array([numpy.nan if v is None else v for v in values], dtype='float64')
+        if all(isinstance(v, str) for v in values):
+            return numpy.array(values, dtype='str')
+        column = numpy.empty(len(values), dtype='object')
+        column[:] = values
+        return column
+
+    def take(self, indices):
+        """ New table with the Items at indices (an integer array or boolean mask), in that order """
+        indices = numpy.asarray(indices)
+        if indices.dtype == bool:
+            indices = numpy.flatnonzero(indices)
+        table = ItemTable([self._items[i] for i in indices], collections=self._collections)
+        table.columns = {key: col[indices] for key, col in self.columns.items()}
+        return table
+
+    def filter(self, mask):
+        """ New table with the Items where mask is True """
+        return self.take(mask)
+
+    def missing(self, key):
+        """ Boolean mask of the Items without a value for key (NaN, NaT or None) """
+        col = self[key]
+        if col.dtype.kind == 'f':
+            return numpy.isnan(col)
+        if col.dtype.kind == 'M':
+            return numpy.isnat(col)
+        if col.dtype.kind == 'O':
+            return numpy.array([v is None for v in col], dtype=bool)
+        return numpy.zeros(len(col), dtype=bool)
+
+    def argsort(self, key, reverse=False):
+        """ Indices that sort the table by key (stable, missing values last either way) """
+        missing = self.missing(key)
+        present = numpy.flatnonzero(~missing)
+        order = present[numpy.argsort(self[key][present], kind='stable')]
+        if reverse:
+            order = order[::-1]
+        return numpy.concatenate([order, numpy.flatnonzero(missing)])
+
+    def sort(self, key, reverse=False):
+        """ New table sorted by key """
+        return self.take(self.argsort(key, reverse=reverse))
+
+    def groupby(self, key):
+        """ Dictionary of value: indices of the Items with that value, None for the Items missing it """
+        missing = self.missing(key)
+        present = numpy.flatnonzero(~missing)
+        values, inverse = numpy.unique(self[key][present], return_inverse=True)
+        inverse = inverse.ravel()
+        order = present[numpy.argsort(inverse, kind='stable')]
+        bounds = numpy.cumsum(numpy.bincount(inverse, minlength=len(values)))[:-1]
+        groups = {v: idx for v, idx in zip(values.tolist(), numpy.split(order, bounds))}
+        if missing.any():
+            groups[None] = numpy.flatnonzero(missing)
+        return groups
+
+    def items(self, mask=None):
+        """ ItemCollection of the Items in this table (where mask is True, if provided) """
+        table = self if mask is None else self.filter(mask)
+        return ItemCollection(table._items, collections=self._collections)
+
+
+# import and end of module prevents problems with circular dependencies.
+from .itemcollection import ItemCollection
@@ -1,11 +1,10 @@
 import json
 import os
-import requests
 
 from logging import getLogger
 from urllib.parse import urljoin
 from .version import __version__
-from .utils import mkdirp, get_s3_signed_url
+from .utils import mkdirp, get_s3_signed_url, get_session
 
 
 logger = getLogger(__name__)
@@ -32,7 +31,7 @@ class Thing(object):
     @classmethod
     def open_remote(self, url, headers={}):
         """ Open remote file """
-        resp = requests.get(url, headers=headers)
+        resp = get_session().get(url, headers=headers)
         if resp.status_code == 200:
             dat = resp.text
         else:
@@ -151,7 +150,7 @@ class Thing(object):
             # use signed URL
             signed_url, signed_headers = get_s3_signed_url(self.filename, rtype='PUT',
                                                            public=True, content_type='application/json')
-            resp = requests.put(signed_url, data=json.dumps(self._data), headers=signed_headers)
+            resp = get_session().put(signed_url, data=json.dumps(self._data), headers=signed_headers)
             if resp.status_code != 200:
                 raise STACError('Unable to save file to %s: %s' % (self.filename, resp.text))
         else:
@@ -7,12 +7,67 @@ import logging
 import os
 import requests
 import sys
+import threading
 import time
 
 from collections.abc import Mapping
+from dateutil.parser import parse as dateparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# defaults for the shared HTTP session (see configure_session)
+SESSION_POOL_SIZE = int(os.getenv('STAC_POOL_SIZE', 10))
+SESSION_TIMEOUT = float(os.getenv('STAC_TIMEOUT', 60))
+SESSION_RETRIES = int(os.getenv('STAC_RETRIES', 5))
+SESSION_BACKOFF = float(os.getenv('STAC_BACKOFF', 0.5))
+RETRY_STATUS = [429, 500, 502, 503, 504]
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('STAC_DOWNLOAD_CHUNK_SIZE', 1024 * 1024))
+
+
+class Session(requests.Session):
+    """ HTTP session with keep-alive connection pooling, a default timeout and retries with backoff """
+
+    def __init__(self, pool_size=SESSION_POOL_SIZE, timeout=SESSION_TIMEOUT,
+                 retries=SESSION_RETRIES, backoff=SESSION_BACKOFF):
+        super(Session, self).__init__()
+        self.timeout = timeout
+        # retry any method: STAC API searches are POSTs without side effects.
+        # once retries are exhausted the last response is returned so callers can report it
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUS,
+                      allowed_methods=False, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super(Session, self).request(method, url, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """ Get the HTTP session shared by all satstac and satsearch requests """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = Session()
+        return _session
+
+
+def configure_session(**kwargs):
+    """ Replace the shared HTTP session with one using these settings (pool_size, timeout, retries, backoff) """
+    global _session
+    with _session_lock:
+        old, _session = _session, Session(**kwargs)
+    if old is not None:
+        old.close()
+    return _session
+
 
 # from https://gist.github.com/angstwad/bf22d1822c38a92ec0a9#gistcomment-2622319
 def dict_merge(dct, merge_dct, add_keys=True):
@@ -53,36 +108,146 @@ def dict_merge(dct, merge_dct, add_keys=True):
     return dct
 
 
-def download_file(url, filename=None, requester_pays=False, headers={}):
-    """ Download a file as filename """
+def download_file(url, filename=None, requester_pays=False, headers={}, progress=None, checksum=None):
+    """ Download a file as filename, resuming a partial download left by an earlier attempt
+
+    The file is written to filename.part and only renamed to filename once its size matches
+    the Content-Length (and checksum, a multihash hex string, if provided). The ETag or
+    Last-Modified of the file is kept in filename.part.validator, and a resumed download asks
+    for the rest with If-Range, so a file changed since is downloaded again rather than spliced.
+    progress is called with the size of each chunk written.
+    """
     filename = os.path.basename(url) if filename is None else filename
     logger.info('Downloading %s as %s' % (url, filename))
     _path = os.path.dirname(filename)
     if not os.path.exists(_path):
         mkdirp(_path)
+    part = filename + '.part'
+    validator_file = part + '.validator'
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    validator = None
+    if offset > 0:
+        try:
+            with open(validator_file) as f:
+                validator = f.read().strip() or None
+        except OSError:
+            pass
+        if validator is None:
+            # nothing to tell if the file is still the same
+            offset = 0
+
+    def get(url, headers):
+        headers = dict(headers or {})
+        if offset > 0:
+            headers['Range'] = 'bytes=%s-' % offset
+            headers['If-Range'] = validator
+        return get_session().get(url, headers=headers, stream=True)
+
+    def restart(resp):
+        resp.close()
+        for fname in [part, validator_file]:
+            if os.path.exists(fname):
+                os.remove(fname)
+        return download_file(url, filename=filename, requester_pays=requester_pays, headers=headers,
+                             progress=progress, checksum=checksum)
+
     # check if on s3, if so try to sign it
     if 's3.amazonaws.com' in url:
         signed_url, signed_headers = get_s3_signed_url(url, requester_pays=requester_pays)
-        resp = requests.get(signed_url, headers=signed_headers, stream=True)
-        if resp.status_code != 200:
-            resp = requests.get(url, headers=headers, stream=True)
+        resp = get(signed_url, signed_headers)
+        if resp.status_code not in [200, 206, 416]:
+            resp = get(url, headers)
     elif 'eosdis.nasa.gov' in url:
         url = url.replace('/archive/', '/api/v2/content/archives/')
-        resp = requests.get(url, headers=headers, stream=True)
+        resp = get(url, headers)
+    else:
+        resp = get(url, headers)
+
+    if resp.status_code == 416:
+        # nothing left to fetch if the partial file already has every byte
+        total = resp.headers.get('Content-Range', '').split('/')[-1]
+        if not total.isdigit() or int(total) != offset:
+            return restart(resp)
+        resp.close()
+        expected = offset
+    elif resp.status_code in [200, 206]:
+        if resp.status_code == 200 and offset > 0:
+            logger.debug('Server ignored range request for %s, or the file changed, restarting download' % url)
+            offset = 0
+        if resp.status_code == 206:
+            # bytes start-end/total, which must continue the partial file
+            start = resp.headers.get('Content-Range', '').replace('bytes', '').strip().split('-')[0]
+            if not start.isdigit() or int(start) != offset:
+                logger.debug('Range of %s does not continue the partial file, restarting download' % url)
+                return restart(resp)
+        if offset == 0:
+            etag = resp.headers.get('ETag')
+            # weak ETags can not be used with If-Range
+            validator = etag if etag and not etag.startswith('W/') else resp.headers.get('Last-Modified')
+            if validator:
+                with open(validator_file, 'w') as f:
+                    f.write(validator)
+            elif os.path.exists(validator_file):
+                os.remove(validator_file)
+        length = resp.headers.get('Content-Length')
+        # the length of an encoded response is not the length of the file
+        encoded = resp.headers.get('Content-Encoding', 'identity') != 'identity'
+        expected = offset + int(length) if length is not None and not encoded else None
+        with open(part, 'ab' if offset > 0 else 'wb') as f:
+            for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:  # filter out keep-alive new chunks
+                    f.write(chunk)
+                    if progress is not None:
+                        progress(len(chunk))
     else:
-        resp = requests.get(url, headers=headers, stream=True)
-    if resp.status_code != 200:
         raise Exception("Unable to download file %s: %s" % (url, resp.text))
-    with open(filename, 'wb') as f:
-        for chunk in resp.iter_content(chunk_size=1024):
-            if chunk:  # filter out keep-alive new chunks
-                f.write(chunk)
+
+    # keep an incomplete file so the next attempt resumes it
+    size = os.path.getsize(part)
+    if expected is not None and size != expected:
+        raise Exception("Incomplete download of %s: %s of %s bytes" % (url, size, expected))
+    if checksum is not None and not check_multihash(part, checksum):
+        os.remove(part)
+        raise Exception("Checksum mismatch for %s" % url)
+    os.replace(part, filename)
+    if os.path.exists(validator_file):
+        os.remove(validator_file)
     return filename
 
+
+# multihash function codes (hex varint) to hashlib names
+MULTIHASH_CODES = {'11': 'sha1', '12': 'sha256', '13': 'sha512', 'd501': 'md5'}
+
+
+def check_multihash(filename, multihash):
+    """ Check a file against a multihash hex string (as in file:checksum), True if the function is not supported """
+    multihash = multihash.lower()
+    for code, name in MULTIHASH_CODES.items():
+        if multihash.startswith(code):
+            # skip the digest length byte
+            digest = multihash[len(code) + 2:]
+            h = hashlib.new(name)
+            with open(filename, 'rb') as f:
+                for block in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    h.update(block)
+            return h.hexdigest() == digest
+    logger.warning('Unsupported multihash %s, not checking %s' % (multihash, filename))
+    return True
+
+
+def parse_datetime(value):
+    """ Parse a datetime string, trying the fast ISO 8601 parser before dateutil """
+    try:
+        return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return dateparse(value)
+
+
 def mkdirp(path):
     """ Recursively make directory """
     if not os.path.isdir(path) and path != '':
-        os.makedirs(path)
+        # may race with another thread making the same directory
+        os.makedirs(path, exist_ok=True)
     return path
 
 
@@ -1,11 +1,21 @@
+import hashlib
+import os
 import re
-import requests
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import OrderedDict
+from json import dumps, loads
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSlider, QLabel, QDockWidget, QPushButton, QDockWidget, \
-    QGridLayout, QComboBox, QLineEdit
-from PyQt5.QtCore import Qt, QTimer, QDate
+    QGridLayout, QComboBox, QLineEdit, QScrollArea, QFileDialog
+from PyQt5.QtCore import Qt, QTimer, QDate, QUrl, QByteArray, QRect, QSize, QObject, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPixmap
+from PyQt5.QtNetwork import QNetworkRequest
 from qgis.core import Qgis, QgsProject, QgsRasterLayer, QgsProject, QgsApplication, QgsCoordinateReferenceSystem, \
-    QgsCoordinateTransform, QgsPointXY
-from qgis.gui import QgsMapCanvas
+    QgsCoordinateTransform, QgsPointXY, QgsTask, QgsFeedback, QgsBlockingNetworkRequest, QgsMapSettings, \
+    QgsMapRendererParallelJob, QgsRectangle
+from qgis.gui import QgsMapCanvas, QgsMapCanvasItem
 from qgis.utils import iface
 from datetime import datetime
 from satsearch import Search
@@ -14,10 +24,191 @@ class Constants:
     STAC_API_URL = 'https://earth-search.aws.element84.com/v0'
     COLLECTION = 'sentinel-s2-l2a-cogs'
     CLOUD_COVER_LIMIT = 80
+    # collection list cached on disk, refreshed in the background once older than this (seconds)
+    COLLECTIONS_CACHE_TTL = 24 * 60 * 60
+    CACHE_DIR = os.path.join(QgsApplication.qgisSettingsDirPath(), 'sie')
+    # Layer Grid: cells per row, size of a cell (pixels), margin around the view with live canvases (pixels)
+    # and delay before updating the live cells after scrolling (ms)
+    GRID_COLUMNS = 3
+    GRID_CELL_SIZE = 256
+    GRID_MARGIN = 256
+    GRID_UPDATE_DELAY = 100
+    # delay before applying the main canvas extent to the grid, restarted by each extent change (ms)
+    GRID_SYNC_DELAY = 250
+    # thumbnails: half width of the extent around the search point (meters), renders at a time
+    # and thumbnails kept in memory
+    THUMBNAIL_RADIUS = 5000
+    THUMBNAIL_JOBS = 4
+    THUMBNAIL_MEMORY_CACHE = 200
+    # thumbnails kept on disk (MB), and days an unused one is kept
+    THUMBNAIL_DISK_CACHE_MB = 100
+    THUMBNAIL_DISK_CACHE_DAYS = 30
+    # timelapse: minimum time per scene (ms), scenes prefetched ahead and prefetch renders at a time
+    TIMELAPSE_INTERVAL = 1200
+    TIMELAPSE_PREFETCH = 3
+    TIMELAPSE_PREFETCH_JOBS = 2
+    # memory for the rendered frames of all the timelapse scenes (MB)
+    TIMELAPSE_FRAME_CACHE_MB = 512
 
 
 layerGridDockWidgetInstance = None
 
+
+class QgsNetworkResponse:
+    """ Minimal requests-like view of a finished QgsBlockingNetworkRequest """
+
+    def __init__(self, request):
+        reply = request.reply()
+        self.status_code = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) or 0
+        self.text = bytes(reply.content()).decode('utf-8', errors='replace')
+        self.headers = {bytes(k).decode('latin-1'): bytes(v).decode('latin-1') for k, v in reply.rawHeaderPairs()}
+        if request.errorCode() != QgsBlockingNetworkRequest.NoError and not self.text:
+            self.text = request.errorMessage()
+
+    def json(self):
+        return loads(self.text)
+
+
+class QgsNetworkSession:
+    """ Sends satsearch queries through the QGIS network stack, so a canceled feedback aborts them in flight """
+
+    def __init__(self, feedback=None):
+        self.feedback = feedback
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        request = QNetworkRequest(QUrl(url))
+        request.setHeader(QNetworkRequest.ContentTypeHeader, 'application/json')
+        for key, value in (headers or {}).items():
+            request.setRawHeader(key.encode('utf-8'), str(value).encode('utf-8'))
+        blocking_request = QgsBlockingNetworkRequest()
+        blocking_request.post(request, QByteArray(dumps(json).encode('utf-8')), False, self.feedback)
+        return QgsNetworkResponse(blocking_request)
+
+    def get(self, url, headers=None, **kwargs):
+        request = QNetworkRequest(QUrl(url))
+        for key, value in (headers or {}).items():
+            request.setRawHeader(key.encode('utf-8'), str(value).encode('utf-8'))
+        blocking_request = QgsBlockingNetworkRequest()
+        blocking_request.get(request, False, self.feedback)
+        return QgsNetworkResponse(blocking_request)
+
+
+def collections_cache_file():
+    return os.path.join(Constants.CACHE_DIR, 'collections.json')
+
+
+def read_cached_collections():
+    """ Return (collection ids, age in seconds) from the disk cache, or (None, None) if there is none """
+    try:
+        with open(collections_cache_file()) as f:
+            data = loads(f.read())
+        return data['collections'], time.time() - data['timestamp']
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def write_cached_collections(collections):
+    os.makedirs(Constants.CACHE_DIR, exist_ok=True)
+    fname = collections_cache_file()
+    with open(fname + '.tmp', 'w') as f:
+        f.write(dumps({'timestamp': time.time(), 'collections': collections}))
+    os.replace(fname + '.tmp', fname)
+
+
+class CollectionsTask(QgsTask):
+    """ Fetches the collection ids of the STAC API in the background and refreshes the disk cache """
+
+    collectionsLoaded = pyqtSignal(list)
+
+    def __init__(self):
+        super(CollectionsTask, self).__init__("Loading STAC collections", QgsTask.CanCancel)
+        self.feedback = QgsFeedback()
+        self.exception = None
+
+    def run(self):
+        try:
+            response = QgsNetworkSession(self.feedback).get(f"{Constants.STAC_API_URL}/collections")
+            if response.status_code != 200:
+                raise Exception(f"Unable to fetch collections ({response.status_code}): {response.text}")
+            collections = [collection["id"] for collection in response.json()["collections"]]
+            write_cached_collections(collections)
+            self.collectionsLoaded.emit(collections)
+            return True
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def cancel(self):
+        self.feedback.cancel()
+        super(CollectionsTask, self).cancel()
+
+
+def scene_image(item, collection, bands, color_formula):
+    """ Build the image record (name, date and titiler URL) for a STAC Item """
+    date_string = re.search(r'\d{8}', item.id).group()
+    date = datetime.strptime(date_string, '%Y%m%d')
+    name = date.strftime('%d/%m/%Y')
+    url = f"https://titiler.xyz/stac/tiles/WebMercatorQuad/{{z}}/{{x}}/{{y}}@1x?url={Constants.STAC_API_URL}/collections/{collection}/items/{item.id}&{bands}&color_formula={color_formula}"
+    return {
+        "id": item.id,
+        "name": f"{collection.upper()} - {name}",
+        "date": date,
+        "url": url,
+        "bands": bands,
+        "color_formula": color_formula
+    }
+
+
+class SearchTask(QgsTask):
+    """ Runs a STAC search in the background, streaming each page of images back through pageReceived """
+
+    # images of the page, pages received, items received, items matched (0 if unknown)
+    pageReceived = pyqtSignal(list, int, int, int)
+
+    def __init__(self, geometry, date_range, collection, bands, color_formula):
+        super(SearchTask, self).__init__("Searching Sentinel images", QgsTask.CanCancel)
+        self.geometry = geometry
+        self.date_range = date_range
+        self.collection = collection
+        self.bands = bands
+        self.color_formula = color_formula
+        self.feedback = QgsFeedback()
+        self.exception = None
+
+    def run(self):
+        try:
+            search = Search(url=Constants.STAC_API_URL,
+                            session=QgsNetworkSession(self.feedback),
+                            intersects=self.geometry,
+                            datetime=self.date_range,
+                            collections=[Constants.COLLECTION],
+                            query={'eo:cloud_cover': {'lt': Constants.CLOUD_COVER_LIMIT}})
+            pages = 0
+            received = 0
+            for page in search.iter_pages():
+                if self.isCanceled():
+                    return False
+                pages += 1
+                received += len(page)
+                # the matched count comes with the first page, no separate count request
+                found = search.matched or 0
+                images = [scene_image(item, self.collection, self.bands, self.color_formula) for item in page]
+                for image in images:
+                    image['point'] = ",".join(str(c) for c in self.geometry['coordinates'])
+                self.pageReceived.emit(images, pages, received, found)
+                if found:
+                    self.setProgress(min(100.0, 100.0 * received / found))
+            return True
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def cancel(self):
+        # abort the request in flight, not only the next page
+        self.feedback.cancel()
+        super(SearchTask, self).cancel()
+
+
 def copy_url_to_clipboard(layer):
     clipboard = QApplication.clipboard()
     clipboard.setText(layer.customProperty("url"))
@@ -25,12 +216,415 @@ def copy_url_to_clipboard(layer):
     iface.messageBar().pushWidget(msg, level=Qgis.Info)
 
 
+class ThumbnailService(QObject):
+    """ Renders each scene once into a small image at a fixed extent around the search point
+
+    Thumbnails are cached by scene id, bands and color formula, in memory and on disk,
+    and rendered a few at a time by QgsMapRendererParallelJob. Thumbnails unused for
+    THUMBNAIL_DISK_CACHE_DAYS, and the least recently used beyond THUMBNAIL_DISK_CACHE_MB,
+    are removed from disk.
+    """
+
+    # cache key, thumbnail
+    thumbnailReady = pyqtSignal(str, QImage)
+
+    def __init__(self):
+        super(ThumbnailService, self).__init__()
+        self.images = OrderedDict()
+        self.queue = OrderedDict()
+        self.jobs = {}
+        # bytes of the thumbnails on disk, counted by prune_disk and then as they are saved
+        self.disk_size = 0
+        self.prune_disk()
+
+    @staticmethod
+    def key(layer):
+        """ Cache key of the thumbnail of a layer """
+        scene = "|".join(str(layer.customProperty(prop)) for prop in ["id", "bands", "color_formula", "point"])
+        return hashlib.sha1(scene.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def filename(key):
+        return os.path.join(Constants.CACHE_DIR, 'thumbnails', key + '.png')
+
+    def cached(self, key):
+        """ Thumbnail from memory or disk, None if not rendered yet """
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+        if os.path.exists(self.filename(key)):
+            image = QImage(self.filename(key))
+            if not image.isNull():
+                # mark as recently used
+                os.utime(self.filename(key))
+                return self.remember(key, image)
+        return None
+
+    def prune_disk(self):
+        """ Remove the thumbnails unused for too long, then the least recently used until under 90% of the limit """
+        path = os.path.join(Constants.CACHE_DIR, 'thumbnails')
+        if not os.path.isdir(path):
+            return
+        entries = []
+        for f in os.scandir(path):
+            if f.name.endswith('.png'):
+                st = f.stat()
+                entries.append((st.st_mtime, st.st_size, f.path))
+        oldest = time.time() - Constants.THUMBNAIL_DISK_CACHE_DAYS * 24 * 60 * 60
+        size = sum(e[1] for e in entries)
+        for mtime, fsize, fname in sorted(entries):
+            if mtime > oldest and size <= Constants.THUMBNAIL_DISK_CACHE_MB * 1024 * 1024 * 0.9:
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+            size -= fsize
+        self.disk_size = size
+
+    def remember(self, key, image):
+        self.images[key] = image
+        while len(self.images) > Constants.THUMBNAIL_MEMORY_CACHE:
+            self.images.popitem(last=False)
+        return image
+
+    def request(self, layer):
+        """ Thumbnail of the layer if cached, otherwise queue its render and emit thumbnailReady when done """
+        if layer.customProperty("point") is None:
+            # not a layer of a search
+            return None
+        key = self.key(layer)
+        image = self.cached(key)
+        if image is None and key not in self.jobs:
+            # by id, the layer may be removed before its turn
+            self.queue[key] = layer.id()
+            self.start_jobs()
+        return image
+
+    def cancel(self, key):
+        """ Drop a queued render (renders already started complete) """
+        self.queue.pop(key, None)
+
+    def discard(self, key):
+        """ Drop the queued or running render of a removed layer """
+        self.queue.pop(key, None)
+        job = self.jobs.pop(key, None)
+        if job is not None:
+            job.cancelWithoutBlocking()
+
+    def clear(self):
+        self.queue.clear()
+        for job in self.jobs.values():
+            job.cancelWithoutBlocking()
+        self.jobs.clear()
+
+    def extent(self, layer):
+        """ Square extent (EPSG:3857) around the search point of the layer """
+        lon, lat = map(float, layer.customProperty("point").split(','))
+        transform = QgsCoordinateTransform(QgsCoordinateReferenceSystem(4326), QgsCoordinateReferenceSystem(3857),
+                                           QgsProject.instance())
+        center = transform.transform(QgsPointXY(lon, lat))
+        radius = Constants.THUMBNAIL_RADIUS
+        return QgsRectangle(center.x() - radius, center.y() - radius, center.x() + radius, center.y() + radius)
+
+    def start_jobs(self):
+        while self.queue and len(self.jobs) < Constants.THUMBNAIL_JOBS:
+            key, layer_id = self.queue.popitem(last=False)
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is None:
+                continue
+            settings = QgsMapSettings()
+            settings.setLayers([layer])
+            settings.setDestinationCrs(QgsCoordinateReferenceSystem(3857))
+            settings.setExtent(self.extent(layer))
+            settings.setOutputSize(QSize(Constants.GRID_CELL_SIZE, Constants.GRID_CELL_SIZE))
+            settings.setBackgroundColor(QColor(Qt.gray))
+            job = QgsMapRendererParallelJob(settings)
+            job.finished.connect(lambda key=key, job=job: self.job_finished(key, job))
+            self.jobs[key] = job
+            job.start()
+
+    def job_finished(self, key, job):
+        if self.jobs.get(key, None) is not job:
+            return
+        del self.jobs[key]
+        image = job.renderedImage()
+        if job.errors():
+            # e.g. tiles that failed to load, render again next time
+            self.thumbnailReady.emit(key, image)
+        else:
+            os.makedirs(os.path.dirname(self.filename(key)), exist_ok=True)
+            image.save(self.filename(key), 'PNG')
+            self.disk_size += os.path.getsize(self.filename(key))
+            if self.disk_size > Constants.THUMBNAIL_DISK_CACHE_MB * 1024 * 1024:
+                self.prune_disk()
+            self.thumbnailReady.emit(key, self.remember(key, image))
+        self.start_jobs()
+
+
+class FrameCache(QObject):
+    """ Renders the scenes of the timelapse off screen, as the main canvas shows them
+
+    Each scene is rendered once per view, with the other layers of the canvas, a few at a
+    time, ahead of the playhead, and the frames are kept so playback, later loops and
+    scrubbing show them without rendering the map again. Frames are rendered at a lower
+    resolution when those of all the scenes would not fit in TIMELAPSE_FRAME_CACHE_MB.
+    """
+
+    # layer id
+    layerReady = pyqtSignal(str)
+
+    def __init__(self, scenes):
+        """ scenes returns the layer ids of the timelapse """
+        super(FrameCache, self).__init__()
+        self.scenes = scenes
+        self.view = None
+        self.frames = OrderedDict()
+        self.size = 0
+        self.wanted = []
+        self.jobs = {}
+
+    def scale(self, settings):
+        """ Resolution of the frames (1 for the canvas resolution) so those of all the scenes fit in memory """
+        size = settings.outputSize() * settings.devicePixelRatio()
+        frames = max(len(self.scenes()), 1) * size.width() * size.height() * 4
+        scale = (Constants.TIMELAPSE_FRAME_CACHE_MB * 1024 * 1024 / frames) ** 0.5 if frames else 1.0
+        # rounded down, so a few more scenes do not render them all again
+        return min(1.0, int(scale * 20) / 20.0 or 0.05)
+
+    def view_key(self, settings):
+        """ What the frames depend on: extent, size, CRS, the other layers and the resolution """
+        scenes = set(self.scenes())
+        layers = tuple(layer.id() for layer in settings.layers() if layer.id() not in scenes)
+        return (settings.extent().toString(), settings.outputSize().width(), settings.outputSize().height(),
+                settings.destinationCrs().authid(), layers, self.scale(settings))
+
+    def is_ready(self, layer_id):
+        return layer_id in self.frames
+
+    def frame(self, layer_id):
+        """ Frame of the layer at the current view, None if not rendered """
+        if self.view != self.view_key(iface.mapCanvas().mapSettings()) or layer_id not in self.frames:
+            return None
+        self.frames.move_to_end(layer_id)
+        return self.frames[layer_id]
+
+    def prefetch(self, layer_ids):
+        """ Render the frames of these layers (the first ones first) at the current main canvas view """
+        view = self.view_key(iface.mapCanvas().mapSettings())
+        if view != self.view:
+            # frames of another view
+            self.clear()
+            self.view = view
+        self.wanted = [lid for lid in layer_ids if lid not in self.frames and lid not in self.jobs]
+        self.start_jobs()
+
+    def cancel(self):
+        """ Stop rendering, keeping the frames """
+        self.wanted = []
+        for job in self.jobs.values():
+            job.cancelWithoutBlocking()
+        self.jobs.clear()
+
+    def clear(self):
+        self.cancel()
+        self.frames.clear()
+        self.size = 0
+
+    def settings(self, layer):
+        """ Main canvas settings with layer in place of the scene it shows """
+        settings = QgsMapSettings(iface.mapCanvas().mapSettings())
+        scenes = set(self.scenes())
+        layers = settings.layers()
+        index = next((i for i, lay in enumerate(layers) if lay.id() in scenes), 0)
+        layers = [lay for lay in layers if lay.id() not in scenes]
+        layers.insert(index, layer)
+        settings.setLayers(layers)
+        settings.setDevicePixelRatio(settings.devicePixelRatio() * self.scale(settings))
+        return settings
+
+    def start_jobs(self):
+        while self.wanted and len(self.jobs) < Constants.TIMELAPSE_PREFETCH_JOBS:
+            layer_id = self.wanted.pop(0)
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is None:
+                continue
+            job = QgsMapRendererParallelJob(self.settings(layer))
+            job.finished.connect(lambda layer_id=layer_id, job=job: self.job_finished(layer_id, job))
+            self.jobs[layer_id] = job
+            job.start()
+
+    def job_finished(self, layer_id, job):
+        if self.jobs.get(layer_id, None) is not job:
+            return
+        del self.jobs[layer_id]
+        self.add(layer_id, job.renderedImage())
+        self.layerReady.emit(layer_id)
+        self.start_jobs()
+
+    def add(self, layer_id, image):
+        if layer_id in self.frames:
+            self.size -= self.frames.pop(layer_id).sizeInBytes()
+        self.frames[layer_id] = image
+        self.size += image.sizeInBytes()
+        # only reached if the scenes changed since the scale was set
+        while self.size > Constants.TIMELAPSE_FRAME_CACHE_MB * 1024 * 1024 and len(self.frames) > 1:
+            self.size -= self.frames.popitem(last=False)[1].sizeInBytes()
+
+
+class FrameItem(QgsMapCanvasItem):
+    """ Shows a timelapse frame over the map canvas """
+
+    def __init__(self, canvas):
+        super(FrameItem, self).__init__(canvas)
+        self.image = None
+        self.setZValue(100)
+
+    def set_image(self, image):
+        self.image = image
+        if image is not None:
+            self.setRect(self.mapCanvas().extent())
+        self.setVisible(image is not None)
+        self.update()
+
+    def paint(self, painter, option=None, widget=None):
+        if self.image is not None:
+            painter.drawImage(self.boundingRect(), self.image)
+
+
+class ExportTask(QgsTask):
+    """ Writes the timelapse frames to a file in the background, see export_frames """
+
+    def __init__(self, frames, filename, interval):
+        super(ExportTask, self).__init__("Exporting timelapse", QgsTask.CanCancel)
+        self.frames = frames
+        self.filename = filename
+        self.interval = interval
+        self.exception = None
+
+    def run(self):
+        try:
+            export_frames(self.frames, self.filename, self.interval)
+            return True
+        except Exception as e:
+            self.exception = e
+            return False
+
+
+def export_frames(frames, filename, interval):
+    """ Write frames (QImages) to an animated GIF (with Pillow) or, for .mp4, a video (with ffmpeg) """
+    if filename.lower().endswith('.mp4'):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError('ffmpeg is needed to export MP4 files')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i, frame in enumerate(frames):
+                frame.save(os.path.join(tmpdir, 'frame_%05d.png' % i), 'PNG')
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(1000.0 / interval),
+                            '-i', os.path.join(tmpdir, 'frame_%05d.png'),
+                            '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2', '-pix_fmt', 'yuv420p', filename], check=True)
+        return filename
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError('Pillow is needed to export GIF files')
+    images = []
+    for frame in frames:
+        frame = frame.convertToFormat(QImage.Format_RGBA8888)
+        data = frame.constBits()
+        data.setsize(frame.sizeInBytes())
+        images.append(Image.frombuffer('RGBA', (frame.width(), frame.height()), bytes(data), 'raw', 'RGBA',
+                                       frame.bytesPerLine(), 1).convert('RGB'))
+    images[0].save(filename, save_all=True, append_images=images[1:], duration=interval, loop=0)
+    return filename
+
+
+class GridCell(QWidget):
+    """ One layer of the Layer Grid: its name, a static thumbnail or a live canvas, and the buttons """
+
+    def __init__(self, layer):
+        super(GridCell, self).__init__()
+        # by id, the layer may be removed while the grid is open
+        self.layer_id = layer.id()
+        self.key = ThumbnailService.key(layer)
+        self.canvas = None
+        self.has_thumbnail = False
+
+        self.layout = QVBoxLayout()
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        label = QLabel(layer.name())
+        label.setStyleSheet("font-size: 12px;")
+        label.setAlignment(Qt.AlignCenter)
+        self.thumbnail = QLabel()
+        self.thumbnail.setFixedSize(Constants.GRID_CELL_SIZE, Constants.GRID_CELL_SIZE)
+        self.thumbnail.setAlignment(Qt.AlignCenter)
+        self.thumbnail.setStyleSheet("background-color: gray;")
+        buttons = QHBoxLayout()
+        self.live_button = QPushButton('Live')
+        self.live_button.setCheckable(True)
+        self.live_button.setToolTip('Show a live map in place of the thumbnail')
+        copy_url_button = QPushButton('Copy URL')
+        copy_url_button.clicked.connect(lambda clicked: copy_url_to_clipboard(self.layer))
+        buttons.addWidget(self.live_button)
+        buttons.addWidget(copy_url_button)
+
+        self.layout.addWidget(label)
+        self.layout.addWidget(self.thumbnail)
+        self.layout.addLayout(buttons)
+        self.setLayout(self.layout)
+
+    @property
+    def layer(self):
+        """ The layer of the cell, None once removed from the project """
+        return QgsProject.instance().mapLayer(self.layer_id)
+
+    def set_thumbnail(self, image, complete=True):
+        self.thumbnail.setPixmap(QPixmap.fromImage(image))
+        self.has_thumbnail = complete
+
+    def attach(self, canvas, extent):
+        """ Show the layer live on canvas, in place of the thumbnail """
+        self.canvas = canvas
+        canvas.cell = self
+        canvas.setLayers([self.layer])
+        canvas.setDestinationCrs(iface.mapCanvas().mapSettings().destinationCrs())
+        canvas.setExtent(extent)
+        canvas.stale = False
+        self.layout.replaceWidget(self.thumbnail, canvas)
+        self.thumbnail.hide()
+        canvas.show()
+        canvas.refresh()
+
+    def detach(self):
+        """ Give back the canvas, showing the thumbnail instead """
+        canvas = self.canvas
+        self.canvas = None
+        canvas.stopRendering()
+        canvas.cell = None
+        canvas.setLayers([])
+        self.layout.replaceWidget(canvas, self.thumbnail)
+        # out of the cell, so it outlives it
+        canvas.setParent(None)
+        self.thumbnail.show()
+        return canvas
+
+
 class LayerGridDockWidget(QDockWidget):
+    """ Grid of the dated layers, shown as thumbnails rendered once per scene
+
+    Thumbnails are only requested for the cells in view (plus a margin), and cells
+    switched to Live get a canvas while in view, recycled between cells as the grid scrolls.
+    """
+
     def __init__(self, layers):
         super(LayerGridDockWidget, self).__init__()
 
         self.setWindowTitle("Layer Grid")
-        self.canvases = []
+        self.cells = []
+        # idle canvases
+        self.canvas_pool = []
+        self.thumbnail_service = ThumbnailService()
+        self.thumbnail_service.thumbnailReady.connect(self.thumbnail_ready)
 
         # Create a scroll area
         self.scrollArea = QScrollArea()
@@ -45,58 +639,155 @@ class LayerGridDockWidget(QDockWidget):
 
         self.setWidget(self.scrollArea)
 
-        # Connect the signal
+        # update the cells in view once scrolling or resizing settles
+        self.visible_timer = QTimer(self)
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.timeout.connect(self.update_visible)
+        for scroll_bar in [self.scrollArea.verticalScrollBar(), self.scrollArea.horizontalScrollBar()]:
+            scroll_bar.valueChanged.connect(self.schedule_update_visible)
+            scroll_bar.rangeChanged.connect(self.schedule_update_visible)
+
+        # Connect the signal, extent changes are coalesced
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.timeout.connect(self.apply_extent)
         iface.mapCanvas().extentsChanged.connect(self.sync_zoom)
 
+        # the dock outlives the layers of a search
+        QgsProject.instance().layersWillBeRemoved.connect(self.layers_removed)
+
         self.updateGrid(layers)
 
+    @property
+    def canvases(self):
+        """ Live canvases """
+        return [cell.canvas for cell in self.cells if cell.canvas is not None]
+
     def updateGrid(self, layers):
         try:
             sorted_layers = sorted(layers, key=lambda x: x.customProperty("date"), reverse=True)
 
-            # Clear existing widgets from the layout
+            # Recycle the canvases and clear existing widgets from the layout
+            for cell in self.cells:
+                if cell.canvas is not None:
+                    self.release_canvas(cell)
             for i in reversed(range(self.layout.count())):
                 widget = self.layout.itemAt(i).widget()
                 if widget is not None:
                     widget.deleteLater()
+            self.thumbnail_service.clear()
 
-            self.canvases = []
-
-            # Add sorted layers to layout
-            row = 0
-            col = 0
-            for layer in sorted_layers:
-                label = QLabel(layer.name())
-                label.setStyleSheet("font-size: 12px;")
-                label.setAlignment(Qt.AlignCenter)
-                canvas = QgsMapCanvas()
-                canvas.setCanvasColor(Qt.gray)
-                canvas.setExtent(layer.extent())
-                canvas.setLayers([layer])
-
-                self.canvases.append(canvas)
-                copy_url_button = QPushButton('Copy URL')
-                copy_url_button.clicked.connect(lambda clicked, layer=layer: copy_url_to_clipboard(layer))
-
-                self.layout.addWidget(label, row, col)
-                self.layout.addWidget(canvas, row + 1, col)
-                self.layout.addWidget(copy_url_button, row + 2, col)
-
-                col += 1
-                if col > 2:
-                    col = 0
-                    row += 3
+            self.cells = []
+
+            # Add sorted layers to layout, the thumbnails are requested once they are in view
+            for i, layer in enumerate(sorted_layers):
+                cell = GridCell(layer)
+                cell.live_button.toggled.connect(self.schedule_update_visible)
+                self.cells.append(cell)
+                self.layout.addWidget(cell, i // Constants.GRID_COLUMNS, i % Constants.GRID_COLUMNS)
+
+            self.schedule_update_visible()
 
         except Exception as e:
             msg = iface.messageBar().createMessage("GRID", f"Error -> {e}")
             iface.messageBar().pushWidget(msg, level=Qgis.Critical)
             pass
 
+    def layers_removed(self, layer_ids):
+        """ Drop the cells of the layers being removed, and their renders """
+        removed = [cell for cell in self.cells if cell.layer_id in layer_ids]
+        if not removed:
+            return
+        for cell in removed:
+            if cell.canvas is not None:
+                self.release_canvas(cell)
+            self.thumbnail_service.discard(cell.key)
+            self.layout.removeWidget(cell)
+            cell.deleteLater()
+        self.cells = [cell for cell in self.cells if cell.layer_id not in layer_ids]
+        # close the gaps
+        for cell in self.cells:
+            self.layout.removeWidget(cell)
+        for i, cell in enumerate(self.cells):
+            self.layout.addWidget(cell, i // Constants.GRID_COLUMNS, i % Constants.GRID_COLUMNS)
+        self.schedule_update_visible()
+
+    def resizeEvent(self, event):
+        super(LayerGridDockWidget, self).resizeEvent(event)
+        self.schedule_update_visible()
+
+    def schedule_update_visible(self, *args):
+        self.visible_timer.start(Constants.GRID_UPDATE_DELAY)
+
+    def visible_rect(self, margin=Constants.GRID_MARGIN):
+        """ Area of the grid in view, plus the margin, in grid coordinates """
+        viewport = self.scrollArea.viewport()
+        left = self.scrollArea.horizontalScrollBar().value()
+        top = self.scrollArea.verticalScrollBar().value()
+        return QRect(left - margin, top - margin, viewport.width() + 2 * margin, viewport.height() + 2 * margin)
+
+    def update_visible(self):
+        """ Request thumbnails for the cells in view, and give live canvases to those switched to Live """
+        if not self.isVisible():
+            return
+        rect = self.visible_rect()
+        in_view = [cell.geometry().intersects(rect) for cell in self.cells]
+        # release first, so the canvases are reused by the cells coming into view
+        for cell, visible in zip(self.cells, in_view):
+            if not visible:
+                self.thumbnail_service.cancel(cell.key)
+            if cell.canvas is not None and not (visible and cell.live_button.isChecked()):
+                self.release_canvas(cell)
+        extent = iface.mapCanvas().extent()
+        for cell, visible in zip(self.cells, in_view):
+            if not visible:
+                continue
+            if not cell.has_thumbnail:
+                image = self.thumbnail_service.request(cell.layer)
+                if image is not None:
+                    cell.set_thumbnail(image)
+            if cell.live_button.isChecked() and cell.canvas is None:
+                cell.attach(self.acquire_canvas(), extent)
+        # canvases in the margin skipped by the last sync
+        self.apply_extent(extent)
+
+    def thumbnail_ready(self, key, image):
+        complete = key in self.thumbnail_service.images
+        for cell in self.cells:
+            if cell.key == key:
+                cell.set_thumbnail(image, complete)
+
+    def acquire_canvas(self):
+        if self.canvas_pool:
+            return self.canvas_pool.pop()
+        canvas = QgsMapCanvas()
+        canvas.setCanvasColor(Qt.gray)
+        canvas.setFixedSize(Constants.GRID_CELL_SIZE, Constants.GRID_CELL_SIZE)
+        canvas.cell = None
+        return canvas
+
+    def release_canvas(self, cell):
+        self.canvas_pool.append(cell.detach())
+
+    def showEvent(self, event):
+        super(LayerGridDockWidget, self).showEvent(event)
+        self.schedule_update_visible()
+
     def sync_zoom(self):
-        main_canvas = iface.mapCanvas()
-        extent = main_canvas.extent()
-        if self.canvases:
-            for canvas in self.canvases:
+        # renders for the previous extent are no longer needed, the new one is applied once panning settles
+        for canvas in self.canvases:
+            if canvas.isDrawing():
+                canvas.stopRendering()
+            canvas.stale = True
+        self.sync_timer.start(Constants.GRID_SYNC_DELAY)
+
+    def apply_extent(self, extent=None):
+        """ Set the main canvas extent on the canvases in view (the others get it when scrolled into view) """
+        extent = extent or iface.mapCanvas().extent()
+        rect = self.visible_rect(margin=0)
+        for canvas in self.canvases:
+            if canvas.stale and canvas.cell.geometry().intersects(rect):
+                canvas.stale = False
                 canvas.setExtent(extent)
                 canvas.refresh()
 
@@ -106,6 +797,9 @@ class SentinelImageExplorerWidget(QWidget):
         super(SentinelImageExplorerWidget, self).__init__()
         self.progress_message_bar = None
         self.progress_bar = None
+        self.progress_label = None
+        self.search_task = None
+        self.collections_task = None
         
         self.timer_smooth = QTimer()
         self.timer_smooth.timeout.connect(self.update_opacity)
@@ -155,8 +849,21 @@ class SentinelImageExplorerWidget(QWidget):
         self.slider.setValue(1)
         self.slider.hide()
 
+        # the timelapse advances once the interval has passed and the tiles of the next scene are loaded
         self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.play_timelapse)
+        self.playing = False
+        self.waiting_layer_id = None
+        self.frame_cache = FrameCache(lambda: self.layer_ids)
+        # (filename, layer ids) of the export waiting for its frames, and the export task
+        self.export_request = None
+        self.export_task = None
+        self.frame_cache.layerReady.connect(self.layer_ready)
+        self.frame_item = FrameItem(iface.mapCanvas())
+        self.frame_item.set_image(None)
+        iface.mapCanvas().extentsChanged.connect(self.view_changed)
+        iface.mapCanvas().mapCanvasRefreshed.connect(self.canvas_refreshed)
 
         self.filterButton = QPushButton("Filter")
         self.filterButton.setCursor(Qt.PointingHandCursor)
@@ -185,6 +892,12 @@ class SentinelImageExplorerWidget(QWidget):
         self.gridButton.setCursor(Qt.PointingHandCursor)
         self.hbox.addWidget(self.gridButton)
 
+        self.exportButton = QPushButton("Export")
+        self.exportButton.setIcon(QgsApplication.getThemeIcon("/mActionFileSaveAs.svg"))
+        self.exportButton.setCursor(Qt.PointingHandCursor)
+        self.exportButton.setToolTip('Export the timelapse as GIF or MP4')
+        self.hbox.addWidget(self.exportButton)
+
         self.removeButton = QPushButton("Remove")
         self.removeButton.setIcon(QgsApplication.getThemeIcon("/mActionFileExit.svg"))
         self.removeButton.setCursor(Qt.PointingHandCursor)
@@ -218,6 +931,7 @@ class SentinelImageExplorerWidget(QWidget):
         self.filterButton.clicked.connect(self.filter_layers)
         self.clearFilterButton.clicked.connect(self.clear_filter)
         self.gridButton.clicked.connect(self.change_visibility_grid)
+        self.exportButton.clicked.connect(self.export_timelapse)
 
         self.setLayout(self.layout)
         self.layer_ids = []
@@ -227,15 +941,20 @@ class SentinelImageExplorerWidget(QWidget):
         self.fetch_collections()
 
     def fetch_collections(self):
-        collections_url = "https://earth-search.aws.element84.com/v0/collections"
-        response = requests.get(collections_url)
-
-        if response.status_code == 200:
-            data = response.json()
-            for collection in data["collections"]:
-                self.collectionComboBox.addItem(collection["id"])
-        
-        self.collectionComboBox.setCurrentText("sentinel-s2-l2a-cogs")
+        # fill the box from the disk cache right away, refresh it in the background when stale or missing
+        collections, age = read_cached_collections()
+        self.set_collections(collections or [Constants.COLLECTION])
+        if collections is None or age > Constants.COLLECTIONS_CACHE_TTL:
+            task = CollectionsTask()
+            task.collectionsLoaded.connect(self.set_collections)
+            self.collections_task = task
+            QgsApplication.taskManager().addTask(task)
+
+    def set_collections(self, collections):
+        current = self.collectionComboBox.currentText() or Constants.COLLECTION
+        self.collectionComboBox.clear()
+        self.collectionComboBox.addItems(collections)
+        self.collectionComboBox.setCurrentText(current)
         
     def fetch_images(self):
         try:
@@ -248,25 +967,19 @@ class SentinelImageExplorerWidget(QWidget):
 
     def search_image(self):
         try:
-            self.start_processing()
             coord_text = self.coordInput.text()
             if coord_text is None or coord_text.strip() == "":
                 msg = iface.messageBar().createMessage("S2_SEARCH", "You need to inform lat and lon.")
                 iface.messageBar().pushWidget(msg, level=Qgis.Critical)
-                self.finish_progress()
                 return
-            self.update_progress(5)
             selected_collection = self.collectionComboBox.currentText()
             bands_text = self.bandsLineEdit.text()
             bands_list = bands_text.replace(" ", "").split(",")
-            self.update_progress(10)
 
             bands = "&".join([f"assets={band}" for band in bands_list])
             color_formula = self.colorFormulaLineEdit.text()
             lat, lon = map(float, coord_text.split(','))
 
-            self.update_progress(13)
-
             geometry = {"type": "Point", "coordinates": [lon, lat]}
 
             start_date = self.startDateEdit.date()
@@ -275,45 +988,89 @@ class SentinelImageExplorerWidget(QWidget):
             iso_start_date = f"{start_date.year()}-{start_date.month():02d}-{start_date.day():02d}"
             iso_end_date = f"{end_date.year()}-{end_date.month():02d}-{end_date.day():02d}"
 
-            self.update_progress(16)
-
             date_range = f"{iso_start_date}/{iso_end_date}"
-            search = Search(url=Constants.STAC_API_URL,
-                            intersects=geometry,
-                            datetime=date_range,
-                            collections=[Constants.COLLECTION],
-                            query={'eo:cloud_cover': {'lt': Constants.CLOUD_COVER_LIMIT}})
-
-            items = sorted(search.items(), key=lambda item: item.properties['eo:cloud_cover'])
 
-            self.update_progress(30)
-
-            total_images = len(items)
-            progress_per_image = 100.0 / total_images
-
-            images = []
-
-            for i, item in enumerate(items):
-                date_string = re.search(r'\d{8}', item.id).group()
-                date = datetime.strptime(date_string, '%Y%m%d')
-                name = date.strftime('%d/%m/%Y')
-                url = f"https://titiler.xyz/stac/tiles/WebMercatorQuad/{{z}}/{{x}}/{{y}}@1x?url={Constants.STAC_API_URL}/collections/{selected_collection}/items/{item.id}&{bands}&color_formula={color_formula}"
-                images.append({
-                    "id": item.id,
-                    "name": f"{selected_collection.upper()} - {name}",
-                    "date": date,
-                    "url": url
-                })
-                self.update_progress(5 + (i + 1) * progress_per_image)
+            # only one search at a time
+            self.cancel_search()
+            self.images = []
+            self.start_processing()
 
-            self.finish_progress()
-            self.images = images
+            task = SearchTask(geometry, date_range, selected_collection, bands, color_formula)
+            # pages a canceled search emitted before it stopped are dropped
+            task.pageReceived.connect(lambda *args: task is self.search_task and self.page_received(*args))
+            task.taskCompleted.connect(lambda: self.search_finished(task))
+            task.taskTerminated.connect(lambda: self.search_terminated(task))
+            self.search_task = task
+            QgsApplication.taskManager().addTask(task)
         except Exception as e:
             self.finish_progress()
             msg = iface.messageBar().createMessage("S2_SEARCH", f"Error Searching Images -> {e}")
             iface.messageBar().pushWidget(msg, level=Qgis.Critical)
             pass
 
+    def cancel_search(self):
+        if self.search_task is not None:
+            task = self.search_task
+            self.search_task = None
+            task.cancel()
+            self.finish_progress()
+
+    def page_received(self, images, pages, received, found):
+        # the scenes of each page are added as it arrives, so the first ones can be browsed while the rest load
+        if pages == 1:
+            if self.playing:
+                self.stop_timelapse()
+            self.remove_layers()
+            self.images = []
+        for image in images:
+            layer_id = self.add_layer(image)
+            if layer_id is None:
+                continue
+            # most recent first
+            index = len([i for i in self.images if i['date'] >= image['date']])
+            self.images.insert(index, image)
+            self.layer_ids.insert(index, layer_id)
+        if self.layer_ids:
+            self.update_slider()
+            if pages == 1 and self.coordInput.text():
+                self.zoom_to_point()
+
+        total = f"/{found}" if found else ""
+        if self.progress_label:
+            self.progress_label.setText(f"Page {pages}: {received}{total} images received...")
+        if found:
+            self.update_progress(int(100 * received / found))
+
+    def update_slider(self):
+        """ Fit the slider to the scenes received so far, keeping the scene on screen """
+        self.slider.blockSignals(True)
+        self.slider.setMinimum(1)
+        self.slider.setMaximum(len(self.layer_ids))
+        shown = self.current_layer_id in self.layer_ids
+        self.slider.setValue(self.layer_ids.index(self.current_layer_id) + 1 if shown else 1)
+        self.slider.blockSignals(False)
+        if not shown:
+            self.slider_changed()
+        self.slider.show()
+
+    def search_finished(self, task):
+        if task is not self.search_task:
+            return
+        self.search_task = None
+        self.finish_progress()
+
+        if len(self.layer_ids) == 0:
+            msg = iface.messageBar().createMessage("FILTER", "No result found for the selected date range or point.")
+            iface.messageBar().pushWidget(msg, level=Qgis.Critical)
+
+    def search_terminated(self, task):
+        if task is not self.search_task:
+            return
+        self.search_task = None
+        self.finish_progress()
+        msg = iface.messageBar().createMessage("S2_SEARCH", f"Error Searching Images -> {task.exception}")
+        iface.messageBar().pushWidget(msg, level=Qgis.Critical)
+
     def init(self):
         # Sort mosaics by date in descending order (most recent first)
         self.images.sort(key=lambda x: x['date'], reverse=True)
@@ -349,6 +1106,10 @@ class SentinelImageExplorerWidget(QWidget):
         layer.setCustomProperty("id", image['id'])
         layer.setCustomProperty("date", image['date'])
         layer.setCustomProperty("url", image['url'])
+        # what the scene thumbnail is rendered from
+        layer.setCustomProperty("bands", image['bands'])
+        layer.setCustomProperty("color_formula", image['color_formula'])
+        layer.setCustomProperty("point", image['point'])
 
         if layer.isValid():
             QgsProject.instance().addMapLayer(layer)
@@ -377,26 +1138,9 @@ class SentinelImageExplorerWidget(QWidget):
 
     def filter_layers(self):
         self.slider.hide()
+        # results are added by page_received as the pages of the background search arrive
         self.search_image()
 
-        if len(self.images) == 0:
-            msg = iface.messageBar().createMessage("FILTER", "No result found for the selected date range or point.")
-            iface.messageBar().pushWidget(msg, level=Qgis.Critical)
-            return
-
-        # Update the slider's maximum value based on the filtered list
-        self.slider.setMaximum(len(self.images) - 1)
-
-        # Remove existing layers and re-initialize based on filtered data
-        self.remove_layers()
-        self.init()
-
-        coord = self.coordInput.text()
-        if coord:
-            self.zoom_to_point()
-
-        self.slider.show()
-
     def clear_filter(self):
         # Resetting the date filters to their initial state
         self.startDateEdit.setDate(QDate.currentDate())
@@ -411,50 +1155,172 @@ class SentinelImageExplorerWidget(QWidget):
         for layer_id in self.layer_ids:
             QgsProject.instance().removeMapLayer(layer_id)
         self.layer_ids.clear()
+        if self.playing:
+            # after clearing, so no removed layer is shown
+            self.stop_timelapse()
+        self.current_layer_id = None
+        self.export_request = None
+        self.frame_cache.clear()
+        self.frame_item.set_image(None)
 
     def start_timelapse(self):
-        self.timer.start(1200)
+        if self.export_request is not None:
+            # rendering the frames of an export
+            return
+        if not self.layer_ids:
+            return
+        self.playing = True
+        self.prefetch_ahead()
+        self.timer.start(Constants.TIMELAPSE_INTERVAL)
 
     def stop_timelapse(self):
+        self.playing = False
+        self.waiting_layer_id = None
         self.timer.stop()
         self.timer_smooth.stop()
+        self.frame_cache.cancel()
+        # show the layer of the frame on screen, the frame is hidden once the canvas has rendered it
+        if self.layer_ids:
+            self.show_layer(self.layer_ids[self.slider.value() - 1])
+
+    def view_changed(self):
+        # frames are of the previous extent
+        self.frame_item.set_image(None)
+        if self.playing and self.layer_ids:
+            self.show_layer(self.layer_ids[self.slider.value() - 1])
+        if self.export_request is not None:
+            # the frames of the new extent are exported
+            self.frame_cache.cancel()
+            self.export_ready()
+
+    def canvas_refreshed(self):
+        if not self.playing:
+            self.frame_item.set_image(None)
+
+    def export_timelapse(self):
+        if not self.layer_ids:
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Timelapse", "", "GIF (*.gif);;MP4 (*.mp4)")
+        if not filename:
+            return
+        if self.playing:
+            self.stop_timelapse()
+        # in playback order, the frames not cached yet are rendered first, see export_ready
+        order = [self.layer_ids[(self.slider.value() - 1 + i) % len(self.layer_ids)]
+                 for i in range(len(self.layer_ids))]
+        self.export_request = (filename, order)
+        msg = iface.messageBar().createMessage("TIMELAPSE", f"Rendering {len(order)} frames to export...")
+        iface.messageBar().pushWidget(msg, level=Qgis.Info)
+        self.export_ready()
+
+    def export_ready(self):
+        """ Export once the frames of the export request are rendered, rendering the missing ones """
+        filename, order = self.export_request
+        frames = [self.frame_cache.frame(layer_id) for layer_id in order]
+        missing = [layer_id for layer_id, frame in zip(order, frames) if frame is None]
+        if missing:
+            if not self.frame_cache.jobs:
+                self.frame_cache.prefetch(missing)
+            return
+        self.export_request = None
+        task = ExportTask(frames, filename, Constants.TIMELAPSE_INTERVAL)
+        task.taskCompleted.connect(lambda: self.export_finished(task))
+        task.taskTerminated.connect(lambda: self.export_finished(task))
+        self.export_task = task
+        QgsApplication.taskManager().addTask(task)
+
+    def export_finished(self, task):
+        self.export_task = None
+        if task.exception is None:
+            msg = iface.messageBar().createMessage("TIMELAPSE", f"Exported to {task.filename}")
+            iface.messageBar().pushWidget(msg, level=Qgis.Info)
+        else:
+            msg = iface.messageBar().createMessage("TIMELAPSE", f"Error exporting -> {task.exception}")
+            iface.messageBar().pushWidget(msg, level=Qgis.Critical)
 
-    def play_timelapse(self):
-        current_value = self.slider.value()
+    def next_value(self, current_value=None):
+        if current_value is None:
+            current_value = self.slider.value()
         if current_value >= self.slider.maximum():
-            self.slider.setValue(self.slider.minimum())
-        else:
-            self.slider.setValue(current_value + 1)
+            return self.slider.minimum()
+        return current_value + 1
+
+    def play_timelapse(self):
+        if not self.layer_ids:
+            # the layers were removed while playing
+            self.stop_timelapse()
+            return
+        value = self.next_value()
+        layer_id = self.layer_ids[value - 1]
+        # the view may have changed since the prefetch
+        self.frame_cache.prefetch([layer_id])
+        if not self.frame_cache.is_ready(layer_id):
+            # advance once its frame is rendered, see layer_ready
+            self.waiting_layer_id = layer_id
+            return
+        self.waiting_layer_id = None
+        self.slider.setValue(value)
+        self.timer.start(Constants.TIMELAPSE_INTERVAL)
+
+    def layer_ready(self, layer_id):
+        if self.export_request is not None:
+            self.export_ready()
+        if self.playing and layer_id == self.waiting_layer_id:
+            self.play_timelapse()
+
+    def prefetch_ahead(self):
+        """ Render the frames of the next scenes of the timelapse """
+        if not self.layer_ids:
+            return
+        values = [self.next_value()]
+        while len(values) < Constants.TIMELAPSE_PREFETCH:
+            values.append(self.next_value(values[-1]))
+        self.frame_cache.prefetch([self.layer_ids[v - 1] for v in values if 0 < v <= len(self.layer_ids)])
 
     def slider_changed(self):
         try:
             index = self.slider.value() - 1
-            # Hide the previous layer by reducing opacity
-            self.target_opacity = 0.0
-            self.timer_smooth.start(50)  # Update every 50ms
-
-            # Hide the previous layer
-            if self.current_layer_id:
-                QgsProject.instance().layerTreeRoot().findLayer(
-                    self.current_layer_id
-                ).setItemVisibilityChecked(False)
-
-            # Show the current layer
-            self.current_layer_id = self.layer_ids[index]
-            layer = QgsProject.instance().layerTreeRoot().findLayer(self.current_layer_id)
-            layer.setItemVisibilityChecked(True)
-            
-            self.target_opacity = 1.0
-            self.timer_smooth.start(50)  # Update every 50ms
-            
+            layer_id = self.layer_ids[index]
+            # a rendered frame is shown right away, while playing the layers are only switched when it stops
+            frame = self.frame_cache.frame(layer_id)
+            self.frame_item.set_image(frame)
+            if frame is None or not self.playing:
+                self.show_layer(layer_id)
+
+            layer = QgsProject.instance().layerTreeRoot().findLayer(layer_id)
             self.label.setText(f"{layer.name()}")
             self.label.setStyleSheet("font-size: 25px;")
+
+            if self.playing:
+                self.prefetch_ahead()
         except Exception as e:
             self.finish_progress()
             msg = iface.messageBar().createMessage("SLIDER", f"Error  -> {e}")
             iface.messageBar().pushWidget(msg, level=Qgis.Critical)
             pass
 
+    def show_layer(self, layer_id):
+        """ Make layer_id the visible layer of the timelapse """
+        if layer_id == self.current_layer_id:
+            return
+        # Hide the previous layer by reducing opacity
+        self.target_opacity = 0.0
+        self.timer_smooth.start(50)  # Update every 50ms
+
+        # Hide the previous layer
+        if self.current_layer_id:
+            QgsProject.instance().layerTreeRoot().findLayer(
+                self.current_layer_id
+            ).setItemVisibilityChecked(False)
+
+        # Show the current layer
+        self.current_layer_id = layer_id
+        layer = QgsProject.instance().layerTreeRoot().findLayer(self.current_layer_id)
+        layer.setItemVisibilityChecked(True)
+
+        self.target_opacity = 1.0
+        self.timer_smooth.start(50)  # Update every 50ms
+
     def change_visibility_grid(self):
         global layerGridDockWidgetInstance
         layers = list(QgsProject.instance().mapLayers().values())
@@ -504,8 +1370,13 @@ class SentinelImageExplorerWidget(QWidget):
         container = QWidget()
         layout = QHBoxLayout(container)
         layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(QLabel("Processing..."))
+        self.progress_label = QLabel("Processing...")
+        layout.addWidget(self.progress_label)
         layout.addWidget(self.progress_bar)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.setCursor(Qt.PointingHandCursor)
+        cancel_button.clicked.connect(self.cancel_search)
+        layout.addWidget(cancel_button)
         container.setLayout(layout)
 
         self.progress_message_bar.layout().addWidget(container)
@@ -523,6 +1394,7 @@ class SentinelImageExplorerWidget(QWidget):
             # Hide and remove the progress bar
             iface.messageBar().clearWidgets()
             self.progress_bar = None
+            self.progress_label = None
             self.progress_message_bar = None
 
 